@@ -0,0 +1,259 @@
+"""
+Replay a realistic mix of page views and RSVPs against a synthetic dataset
+from several threads and report throughput and latency percentiles per view.
+
+    python benchmarks/load_test.py --users 2000 --events 500 --requests 3000
+
+Requests go through Django's test client in-process, so the numbers are the
+cost of the views, templates and queries without any network or web server
+in front of them. Event pages and RSVPs pick events with the same power-law
+popularity the generator used, so hot events get most of the traffic.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "event_system.settings")
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from events.models import Category, Event
+from events.synthetic import generate, popularity_weights
+
+# (view, weight) - roughly what the access logs of a small event site show.
+MIX = (
+    ("home", 30),
+    ("home: search", 8),
+    ("home: category", 7),
+    ("event_detail", 25),
+    ("participant_dashboard", 8),
+    ("organizer_dashboard", 4),
+    ("admin_dashboard", 3),
+    ("event_dashboard", 5),
+    ("rsvp", 10),
+)
+
+
+class Scenario:
+    """Everything a worker needs to pick its next request."""
+
+    def __init__(self, summary, alpha):
+        ranked = summary["events_by_popularity"]
+        self.events = ranked
+        self.cum_weights = list(
+            itertools.accumulate(popularity_weights(len(ranked), alpha))
+        )
+        self.categories = list(Category.objects.values_list("name", flat=True))
+        self.words = [
+            name.split()[0] for name in Event.objects.values_list("name", flat=True)
+        ]
+        self.participants = list(
+            User.objects.filter(groups__name="Participant").values_list("pk", flat=True)
+        )
+        self.organizers = list(
+            User.objects.filter(groups__name="Organizer").values_list("pk", flat=True)
+        )
+        admin = User.objects.create(username="load_test_admin", password="!")
+        admin.groups.add(Group.objects.get(name="Admin"))
+        self.admin = admin.pk
+
+    def hot_event(self, rng):
+        return rng.choices(self.events, cum_weights=self.cum_weights)[0]
+
+
+def _client(user_id=None):
+    client = Client(raise_request_exception=False)
+    if user_id is not None:
+        client.force_login(User.objects.get(pk=user_id))
+    return client
+
+
+def _timed(view, send, *args, **kwargs):
+    began = time.perf_counter()
+    response = send(*args, **kwargs)
+    return view, response, (time.perf_counter() - began) * 1000
+
+
+class Worker:
+    def __init__(self, scenario, seed):
+        self.scenario = scenario
+        self.rng = random.Random(seed)
+        self.anonymous = _client()
+        self.participant = _client(self.rng.choice(scenario.participants))
+        self.organizer = _client(self.rng.choice(scenario.organizers))
+        self.admin = _client(scenario.admin)
+
+    def request(self, view):
+        """Issue the request(s) for ``view``; return ``(view, response, ms)``s."""
+
+        rng, scenario = self.rng, self.scenario
+        if view == "home":
+            return [_timed(view, self.anonymous.get, reverse("home"))]
+        if view == "home: search":
+            query = {"query": rng.choice(scenario.words)}
+            return [_timed(view, self.anonymous.get, reverse("home"), query)]
+        if view == "home: category":
+            query = {"category": rng.choice(scenario.categories)}
+            return [_timed(view, self.anonymous.get, reverse("home"), query)]
+        if view == "event_detail":
+            url = reverse("event_details", args=[scenario.hot_event(rng)])
+            return [_timed(view, self.participant.get, url)]
+        if view == "participant_dashboard":
+            url = reverse("participant_dashboard")
+            return [_timed(view, self.participant.get, url)]
+        if view == "organizer_dashboard":
+            return [_timed(view, self.organizer.get, reverse("dashboard"))]
+        if view == "admin_dashboard":
+            return [_timed(view, self.admin.get, reverse("dashboard"))]
+        if view == "event_dashboard":
+            return [_timed(view, self.organizer.get, reverse("event"))]
+
+        # RSVP to a hot event and cancel again if already going, so the mix
+        # keeps writing instead of settling into no-op RSVPs.
+        event_id = scenario.hot_event(rng)
+        accept_json = {"HTTP_ACCEPT": "application/json"}
+        url = reverse("rsvp_event", args=[event_id])
+        results = [_timed("rsvp", self.participant.post, url, **accept_json)]
+        response = results[0][1]
+        if response.status_code == 200 and response.json()["status"] != "created":
+            url = reverse("cancel_rsvp", args=[event_id])
+            cancel = _timed("cancel_rsvp", self.participant.post, url, **accept_json)
+            results.append(cancel)
+        return results
+
+
+def run(scenario, requests, concurrency, seed):
+    views = [view for view, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency)
+
+    def work(worker_seed, count):
+        worker = Worker(scenario, worker_seed)
+        plan = worker.rng.choices(views, weights=weights, k=count)
+        start.wait()
+        try:
+            for view in plan:
+                results = worker.request(view)
+                with lock:
+                    for name, response, elapsed in results:
+                        timings[name].append(elapsed)
+                        if response.status_code >= 500:
+                            errors[name] += 1
+        finally:
+            connection.close()
+
+    shares = [requests // concurrency] * concurrency
+    shares[0] += requests % concurrency
+    threads = [
+        threading.Thread(target=work, args=(seed + i, share))
+        for i, share in enumerate(shares)
+    ]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, errors, time.perf_counter() - began
+
+
+def percentile(sorted_timings, p):
+    index = min(len(sorted_timings) - 1, round(p / 100 * (len(sorted_timings) - 1)))
+    return sorted_timings[index]
+
+
+def report(timings, errors, elapsed):
+    total = sum(len(samples) for samples in timings.values())
+    print(f"\n{total} requests in {elapsed:.2f}s, {total / elapsed:.1f} req/s\n")
+
+    width = max(len(view) for view in timings)
+    header = ("count", "errors", "req/s", "mean", "p50", "p90", "p99", "max")
+    print(f"{'view':<{width}}  " + "  ".join(f"{h:>8}" for h in header))
+    for view in sorted(timings, key=lambda v: -len(timings[v])):
+        samples = sorted(timings[view])
+        row = (
+            f"{len(samples):>8}",
+            f"{errors[view]:>8}",
+            f"{len(samples) / elapsed:>8.1f}",
+            f"{statistics.fmean(samples):>8.1f}",
+            f"{percentile(samples, 50):>8.1f}",
+            f"{percentile(samples, 90):>8.1f}",
+            f"{percentile(samples, 99):>8.1f}",
+            f"{samples[-1]:>8.1f}",
+        )
+        print(f"{view:<{width}}  " + "  ".join(row))
+    print("\nLatencies in milliseconds.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--rsvps-per-user", type=float, default=5.0)
+    parser.add_argument("--alpha", type=float, default=1.1)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    if connection.vendor == "sqlite":
+        # Each thread needs its own connection to a shared database.
+        test_name = os.path.join(tempfile.mkdtemp(), "load_test.sqlite3")
+        connection.settings_dict["TEST"]["NAME"] = test_name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    try:
+        print(f"Generating {args.users} users and {args.events} events...")
+        summary = generate(
+            users=args.users,
+            events=args.events,
+            categories=args.categories,
+            rsvps_per_user=args.rsvps_per_user,
+            alpha=args.alpha,
+            seed=args.seed,
+            prefix="load",
+        )
+        print(
+            f"{summary['rsvps']} RSVPs; the hottest event has "
+            f"{summary['hottest_event_rsvps']}, "
+            f"the median {summary['median_event_rsvps']}."
+        )
+        scenario = Scenario(summary, args.alpha)
+
+        if args.warmup:
+            run(scenario, args.warmup, 1, args.seed)
+        timings, errors, elapsed = run(
+            scenario, args.requests, args.concurrency, args.seed
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    report(timings, errors, elapsed)
+
+
+if __name__ == "__main__":
+    main()
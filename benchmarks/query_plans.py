@@ -0,0 +1,178 @@
+"""
+Seed a throwaway database with a large catalog and report the query plan
+and timing of each hot view query, first with only the single-column
+foreign key indexes Event used to have and then with the composite
+indexes from events/migrations/0006_event_indexes.py.
+
+    python benchmarks/query_plans.py --events 50000 --repeat 20
+"""
+
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "event_system.settings")
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection, models
+from django.utils import timezone
+
+from events.models import Category, Event
+from events.pagination import DATE_ORDERING, _seek
+from events.views import all_events
+
+PAGE = 13
+
+# The indexes Django created for Event before the composite ones existed.
+BASELINE_INDEXES = [
+    models.Index(fields=["category"], name="bench_category_fk_idx"),
+    models.Index(fields=["created_by"], name="bench_created_by_fk_idx"),
+]
+
+
+def seed(n_events, n_users, n_categories):
+    rng = random.Random(42)
+    today = timezone.now().date()
+
+    categories = Category.objects.bulk_create(
+        Category(name=f"Category {i}") for i in range(n_categories)
+    )
+    users = User.objects.bulk_create(
+        User(username=f"organizer_{i}", password="!") for i in range(n_users)
+    )
+    Event.objects.bulk_create(
+        (
+            Event(
+                name=f"Event {i}",
+                description="Benchmark event",
+                date=today + datetime.timedelta(days=rng.randint(-365, 365)),
+                time=datetime.time(rng.randint(8, 21), rng.choice((0, 15, 30, 45))),
+                location="Dhaka",
+                category=rng.choice(categories),
+                created_by=rng.choice(users),
+            )
+            for i in range(n_events)
+        ),
+        batch_size=2000,
+    )
+    return categories, users
+
+
+def view_queries(today, category, organizer, deep_event):
+    ordered = all_events().order_by(*DATE_ORDERING)
+    deep_cursor = [getattr(deep_event, field) for field in DATE_ORDERING]
+
+    return {
+        "home: first page": (ordered[:PAGE], list),
+        "home: keyset deep page": (
+            ordered.filter(_seek("after", DATE_ORDERING, deep_cursor))[:PAGE],
+            list,
+        ),
+        "home: category filter": (
+            ordered.filter(category__name=category.name)[:PAGE],
+            list,
+        ),
+        "home: date range": (
+            ordered.filter(
+                date__range=[today, today + datetime.timedelta(days=30)]
+            )[:PAGE],
+            list,
+        ),
+        "dashboard: today": (Event.objects.filter(date=today), list),
+        "dashboard: upcoming count": (
+            Event.objects.filter(date__gte=today),
+            lambda qs: qs.count(),
+        ),
+        "dashboard: past count": (
+            Event.objects.filter(date__lt=today),
+            lambda qs: qs.count(),
+        ),
+        "organizer: upcoming": (
+            Event.objects.filter(created_by=organizer, date__gte=today),
+            list,
+        ),
+    }
+
+
+def measure(queries, repeat):
+    results = {}
+    for name, (queryset, evaluate) in queries.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            evaluate(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = (statistics.median(timings), queryset.explain())
+    return results
+
+
+def set_indexes(composite):
+    unique_name = Category._meta.get_field("name")
+    plain_name = unique_name.clone()
+    plain_name.set_attributes_from_name("name")
+    plain_name._unique = False
+
+    with connection.schema_editor() as editor:
+        if composite:
+            for index in BASELINE_INDEXES:
+                editor.remove_index(Event, index)
+            editor.alter_field(Category, plain_name, unique_name)
+            for index in Event._meta.indexes:
+                editor.add_index(Event, index)
+        else:
+            for index in Event._meta.indexes:
+                editor.remove_index(Event, index)
+            editor.alter_field(Category, unique_name, plain_name)
+            for index in BASELINE_INDEXES:
+                editor.add_index(Event, index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    try:
+        print(f"Seeding {args.events} events...")
+        categories, users = seed(args.events, args.users, args.categories)
+        today = timezone.now().date()
+        deep_event = Event.objects.order_by(*DATE_ORDERING)[args.events * 9 // 10]
+        queries = view_queries(today, categories[0], users[0], deep_event)
+
+        set_indexes(composite=False)
+        before = measure(queries, args.repeat)
+        set_indexes(composite=True)
+        after = measure(queries, args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    width = max(len(name) for name in queries)
+    print(f"\n{'query':<{width}}  {'before ms':>10}  {'after ms':>10}  {'speedup':>8}")
+    for name in queries:
+        b, a = before[name][0], after[name][0]
+        print(f"{name:<{width}}  {b:>10.2f}  {a:>10.2f}  {b / a if a else 0:>7.1f}x")
+
+    for name in queries:
+        print(f"\n== {name}")
+        print("before:\n  " + before[name][1].replace("\n", "\n  "))
+        print("after:\n  " + after[name][1].replace("\n", "\n  "))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Hammer one capped event with concurrent RSVPs and cancellations from many
+threads, each on its own database connection, and check that it is never
+overbooked and that every freed seat goes to the head of the waitlist.
+
+    python benchmarks/rsvp_stress.py --users 500 --capacity 50 --threads 16
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "event_system.settings")
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from events import rsvp
+from events.models import Category, Event, WaitlistEntry
+
+
+def seed(n_users, capacity):
+    category = Category.objects.create(name="Stress")
+    organizer = User.objects.create(username="organizer", password="!")
+    event = Event.objects.create(
+        name="Stress test",
+        description="Concurrency stress test",
+        date=timezone.now().date() + datetime.timedelta(days=7),
+        time=datetime.time(18, 0),
+        location="Dhaka",
+        category=category,
+        created_by=organizer,
+        capacity=capacity,
+    )
+    users = User.objects.bulk_create(
+        User(username=f"stress_{i}", email=f"stress_{i}@example.com", password="!")
+        for i in range(n_users)
+    )
+    return event, users
+
+
+def hammer(action, event, users, threads):
+    """Run ``action(event, user)`` for every user across ``threads`` threads."""
+
+    results = Counter()
+    retries = Counter()
+    lock = threading.Lock()
+    start = threading.Barrier(threads)
+    shares = [users[i::threads] for i in range(threads)]
+
+    def worker(share):
+        start.wait()
+        try:
+            for user in share:
+                while True:
+                    try:
+                        result = action(event, user)
+                        break
+                    except OperationalError:
+                        # SQLite reports a busy writer instead of queueing it.
+                        with lock:
+                            retries[action.__name__] += 1
+                        time.sleep(random.uniform(0.001, 0.01))
+                with lock:
+                    results[result] += 1
+        finally:
+            connection.close()
+
+    pool = [threading.Thread(target=worker, args=(share,)) for share in shares]
+    began = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return results, retries, time.perf_counter() - began
+
+
+def check(label, condition, failures):
+    print(f"  [{'ok' if condition else 'FAIL'}] {label}")
+    if not condition:
+        failures.append(label)
+
+
+def check_invariants(event, failures):
+    event.refresh_from_db()
+    attendees = event.participants.count()
+    waiting = set(queue_order(event))
+    attending = set(event.participants.values_list("id", flat=True))
+
+    check(
+        f"rsvp_count {event.rsvp_count} == attendees {attendees}",
+        event.rsvp_count == attendees,
+        failures,
+    )
+    check(
+        f"attendees {attendees} <= capacity {event.capacity}",
+        attendees <= event.capacity,
+        failures,
+    )
+    check("nobody both attending and waitlisted", not waiting & attending, failures)
+    check(
+        "no free seat while people wait",
+        not waiting or attendees == event.capacity,
+        failures,
+    )
+
+
+def queue_order(event):
+    entries = WaitlistEntry.objects.filter(event=event)
+    return list(entries.values_list("user_id", flat=True))
+
+
+def run(args):
+    failures = []
+    event, users = seed(args.users, args.capacity)
+    rng = random.Random(42)
+
+    print(f"\nPhase 1: {args.users} users RSVP at once on {args.threads} threads")
+    with contextlib.redirect_stdout(io.StringIO()):
+        results, retries, elapsed = hammer(rsvp.rsvp, event, users, args.threads)
+    print(f"  {dict(results)} in {elapsed:.2f}s, lock retries: {sum(retries.values())}")
+    check_invariants(event, failures)
+    expected_seats = min(args.capacity, args.users)
+    check(
+        f"{expected_seats} created", results[rsvp.CREATED] == expected_seats, failures
+    )
+
+    print("\nPhase 2: everyone clicks RSVP again")
+    with contextlib.redirect_stdout(io.StringIO()):
+        results, retries, elapsed = hammer(rsvp.rsvp, event, users, args.threads)
+    print(f"  {dict(results)} in {elapsed:.2f}s, lock retries: {sum(retries.values())}")
+    check(
+        "no new seats or queue places",
+        rsvp.CREATED not in results and rsvp.WAITLISTED not in results,
+        failures,
+    )
+    check_invariants(event, failures)
+
+    attending = list(event.participants.values_list("id", flat=True))
+    leaving = rng.sample(attending, min(args.cancellations, len(attending)))
+    queue = queue_order(event)
+
+    print(f"\nPhase 3: {len(leaving)} attendees cancel at once")
+    leavers = list(User.objects.filter(pk__in=leaving))
+    with contextlib.redirect_stdout(io.StringIO()):
+        results, retries, elapsed = hammer(rsvp.cancel_rsvp, event, leavers, args.threads)
+    print(f"  {dict(results)} in {elapsed:.2f}s, lock retries: {sum(retries.values())}")
+    check_invariants(event, failures)
+    promoted = set(event.participants.values_list("id", flat=True)) - set(attending)
+    check(
+        f"the first {len(leaving)} in the queue were promoted, in order",
+        promoted == set(queue[: len(leaving)]),
+        failures,
+    )
+
+    attending = list(event.participants.values_list("id", flat=True))
+    bulk = attending[: args.cancellations]
+    queue = queue_order(event)
+
+    print(f"\nPhase 4: {len(bulk)} attendees removed in one bulk operation")
+    with contextlib.redirect_stdout(io.StringIO()):
+        with transaction.atomic():
+            event.participants.remove(*bulk)
+    check_invariants(event, failures)
+    promoted = set(event.participants.values_list("id", flat=True)) - set(attending)
+    check(
+        f"the first {len(bulk)} in the queue were promoted in one pass",
+        promoted == set(queue[: len(bulk)]),
+        failures,
+    )
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--cancellations", type=int, default=20)
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict["NAME"]
+    if connection.vendor == "sqlite":
+        # The default in-memory test database cannot be shared by threads
+        # that each need their own connection.
+        test_name = os.path.join(tempfile.mkdtemp(), "stress.sqlite3")
+        connection.settings_dict["TEST"]["NAME"] = test_name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    try:
+        failures = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if failures:
+        print(f"\n{len(failures)} check(s) failed.")
+        sys.exit(1)
+    print("\nAll checks passed.")
+
+
+if __name__ == "__main__":
+    main()
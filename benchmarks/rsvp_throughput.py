@@ -0,0 +1,246 @@
+"""
+Compare RSVP write throughput across database connection modes: threads of
+logged-in clients RSVP to and cancel from a handful of events through the
+JSON endpoints, and each mode reports requests per second, latency
+percentiles, errors and how many connections it opened.
+
+    python benchmarks/rsvp_throughput.py --users 64 --events 8 --requests 2000
+
+On SQLite it compares the stock settings (rollback journal, deferred
+transactions, a new connection per request) with the tuned ones from
+settings.py. With DB_ENGINE=postgresql it compares a connection per request,
+persistent connections and psycopg's pool.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "event_system.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Category, Event
+
+
+def modes():
+    """
+    ``(name, settings overrides, setup SQL)`` for every mode this backend
+    supports; the SQL runs once on the freshly migrated database.
+    """
+
+    if connection.vendor == "sqlite":
+        return [
+            (
+                "sqlite: stock",
+                {"CONN_MAX_AGE": 0, "OPTIONS": {}},
+                # Undo the WAL switch made by the migrations.
+                ["PRAGMA journal_mode = DELETE"],
+            ),
+            ("sqlite: tuned", {}, []),
+        ]
+
+    options = {
+        key: value
+        for key, value in connection.settings_dict["OPTIONS"].items()
+        if key != "pool"
+    }
+    found = [
+        ("postgresql: per request", {"CONN_MAX_AGE": 0, "OPTIONS": options}, []),
+        (
+            "postgresql: persistent",
+            {"CONN_MAX_AGE": settings.DB_CONN_MAX_AGE or 60, "OPTIONS": options},
+            [],
+        ),
+    ]
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        print('Skipping the pooled mode: pip install "psycopg[pool]" to run it.')
+    else:
+        pool = {"pool": {"min_size": 2, "max_size": 20, "timeout": 10}}
+        found.append(
+            (
+                "postgresql: pool",
+                {"CONN_MAX_AGE": 0, "OPTIONS": {**options, **pool}},
+                [],
+            )
+        )
+    return found
+
+
+def seed(n_users, n_events, capacity):
+    category = Category.objects.create(name="Throughput")
+    organizer = User.objects.create(username="organizer", password="!")
+    events = Event.objects.bulk_create(
+        Event(
+            name=f"Throughput {i}",
+            description="RSVP throughput benchmark",
+            date=timezone.now().date() + datetime.timedelta(days=7),
+            time=datetime.time(18, 0),
+            location="Dhaka",
+            category=category,
+            created_by=organizer,
+            capacity=capacity,
+        )
+        for i in range(n_events)
+    )
+    users = User.objects.bulk_create(
+        User(username=f"writer_{i}", email=f"writer_{i}@example.com", password="!")
+        for i in range(n_users)
+    )
+    return [event.pk for event in events], users
+
+
+def hammer(event_ids, users, requests, threads):
+    """
+    Each thread's users toggle their RSVP to random events. Every request
+    ends with close_old_connections(), as Django's request_finished handler
+    would, so CONN_MAX_AGE and the pool behave as they do when serving.
+    """
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(threads)
+    accept_json = {"HTTP_ACCEPT": "application/json"}
+
+    def worker(share, count, rng):
+        clients = []
+        for user in share:
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            clients.append((client, set()))
+        close_old_connections()
+        start.wait()
+        try:
+            for _ in range(count):
+                client, attending = rng.choice(clients)
+                event_id = rng.choice(event_ids)
+                view = "cancel_rsvp" if event_id in attending else "rsvp_event"
+                began = time.perf_counter()
+                response = client.post(reverse(view, args=[event_id]), **accept_json)
+                close_old_connections()
+                elapsed = (time.perf_counter() - began) * 1000
+                if response.status_code == 200:
+                    attending.symmetric_difference_update({event_id})
+                with lock:
+                    latencies.append(elapsed)
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+        finally:
+            connection.close()
+
+    shares = [users[i::threads] for i in range(threads)]
+    counts = [requests // threads] * threads
+    counts[0] += requests % threads
+    pool = [
+        threading.Thread(target=worker, args=(share, count, random.Random(i)))
+        for i, (share, count) in enumerate(zip(shares, counts))
+    ]
+    began = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies, errors, time.perf_counter() - began
+
+
+def percentile(sorted_timings, p):
+    index = min(len(sorted_timings) - 1, round(p / 100 * (len(sorted_timings) - 1)))
+    return sorted_timings[index]
+
+
+def run_mode(overrides, setup_sql, args):
+    saved = {key: connection.settings_dict[key] for key in overrides}
+    connection.settings_dict.update(overrides)
+    old_name = connection.settings_dict["NAME"]
+    if connection.vendor == "sqlite":
+        # Threads need their own connections to a shared on-disk database.
+        test_name = os.path.join(tempfile.mkdtemp(), "throughput.sqlite3")
+        connection.settings_dict["TEST"]["NAME"] = test_name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    with connection.cursor() as cursor:
+        for sql in setup_sql:
+            cursor.execute(sql)
+
+    opened = []
+
+    def count_connection(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection_created.connect(count_connection)
+    try:
+        event_ids, users = seed(args.users, args.events, args.capacity)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = hammer(event_ids, users, args.requests, args.threads)
+    finally:
+        connection_created.disconnect(count_connection)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
+        connection.settings_dict.update(saved)
+    return (*result, len(opened))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--events", type=int, default=8)
+    parser.add_argument("--capacity", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    header = ("req/s", "mean", "p50", "p99", "errors", "conns")
+    rows = []
+    for name, overrides, setup_sql in modes():
+        print(f"Running {name}...")
+        latencies, errors, elapsed, opened = run_mode(overrides, setup_sql, args)
+        latencies.sort()
+        rows.append(
+            (
+                name,
+                f"{len(latencies) / elapsed:>8.1f}",
+                f"{statistics.fmean(latencies):>8.1f}",
+                f"{percentile(latencies, 50):>8.1f}",
+                f"{percentile(latencies, 99):>8.1f}",
+                f"{len(errors):>8}",
+                f"{opened:>8}",
+            )
+        )
+
+    width = max(len(row[0]) for row in rows)
+    print(f"\n{'mode':<{width}}  " + "  ".join(f"{h:>8}" for h in header))
+    for name, *cells in rows:
+        print(f"{name:<{width}}  " + "  ".join(cells))
+    print(
+        f"\n{args.requests} RSVP/cancel requests per mode on {args.threads} "
+        "threads. Latencies in milliseconds; conns counts connections opened."
+    )
+
+
+if __name__ == "__main__":
+    main()
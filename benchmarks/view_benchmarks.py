@@ -0,0 +1,274 @@
+"""
+Measure the SQL query count and wall time of every hot view at two fixed
+dataset sizes and compare them with benchmarks/baselines.json.
+
+    python benchmarks/view_benchmarks.py             # check, exit 1 on regression
+    python benchmarks/view_benchmarks.py --update    # record new baselines
+
+A view fails when it runs more queries on the large dataset than on the
+small one (an N+1), more queries than its baseline, or, unless --no-timing
+is given, slower than its baseline by more than --threshold. Query counts
+are taken with every cache cleared, so they are the cold worst case; times
+are the median of --repeat warm runs. Runs offline against a throwaway
+SQLite database.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "event_system.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import caches
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+
+from events.models import Category, Event
+from events.synthetic import generate
+
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+
+SIZES = {
+    "small": {"users": 100, "events": 40, "categories": 5},
+    "large": {"users": 1000, "events": 400, "categories": 20},
+}
+
+# Latency regressions smaller than this are noise, whatever the ratio.
+MIN_REGRESSION_MS = 5.0
+
+
+class Dataset:
+    def __init__(self, size):
+        summary = generate(**SIZES[size], seed=7, prefix="bench")
+        self.hot_event = summary["events_by_popularity"][0]
+        self.category_id, self.category = Category.objects.values_list(
+            "id", "name"
+        ).first()
+        self.word = Event.objects.values_list("name", flat=True).first().split()[0]
+
+        self.participant = User.objects.filter(groups__name="Participant").first()
+        # The busiest organizer, so a per-event query shows up as growth.
+        self.organizer = (
+            User.objects.filter(groups__name="Organizer")
+            .annotate(events=Count("created_events"))
+            .order_by("-events", "pk")
+            .first()
+        )
+        self.admin = User.objects.create(username="bench_admin", password="!")
+        self.admin.groups.add(Group.objects.get(name="Admin"))
+
+    def client(self, user=None):
+        client = Client(raise_request_exception=True)
+        if user is not None:
+            client.force_login(user)
+        return client
+
+
+def scenarios(data):
+    """
+    ``(name, send, prepare)`` for every measured request. ``prepare``, when
+    given, runs unmeasured before each send to reset whatever it changed.
+    """
+
+    anonymous = data.client()
+    participant = data.client(data.participant)
+    organizer = data.client(data.organizer)
+    admin = data.client(data.admin)
+
+    home = reverse("home")
+    # Rendered, not served from the page cache, so the context is there.
+    clear_caches()
+    next_query = anonymous.get(home).context["page"].next_query
+
+    rsvp_url = reverse("rsvp_event", args=[data.hot_event])
+    cancel_url = reverse("cancel_rsvp", args=[data.hot_event])
+
+    views = [
+        ("home", lambda: anonymous.get(home)),
+        ("home: next page", lambda: anonymous.get(f"{home}?{next_query}")),
+        ("home: search", lambda: anonymous.get(home, {"query": data.word})),
+        ("home: category", lambda: anonymous.get(home, {"category": data.category})),
+        (
+            "event_detail",
+            lambda: participant.get(reverse("event_details", args=[data.hot_event])),
+        ),
+        (
+            "participant_dashboard",
+            lambda: participant.get(reverse("participant_dashboard")),
+        ),
+        ("organizer_dashboard", lambda: organizer.get(reverse("dashboard"))),
+        ("admin_dashboard", lambda: admin.get(reverse("dashboard"))),
+        ("event_dashboard", lambda: organizer.get(reverse("event"))),
+        ("category_dashboard", lambda: organizer.get(reverse("category_dashboard"))),
+        (
+            "category_events",
+            lambda: organizer.get(reverse("category_events", args=[data.category_id])),
+        ),
+    ]
+    return [(name, send, None) for name, send in views] + [
+        # Cancel first so every run is a fresh RSVP.
+        (
+            "rsvp",
+            lambda: participant.post(rsvp_url),
+            lambda: participant.post(cancel_url),
+        ),
+    ]
+
+
+def clear_caches():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+def measure(send, prepare, repeat):
+    prepare = prepare or (lambda: None)
+    prepare()
+    clear_caches()
+    # queries_log is a bounded deque; once full its length stops growing.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        response = send()
+    # Read now: every later request resets the log as it starts.
+    cold_queries = len(queries.captured_queries)
+    if response.status_code >= 400:
+        raise RuntimeError(f"status {response.status_code}")
+
+    timings = []
+    for _ in range(repeat):
+        prepare()
+        began = time.perf_counter()
+        send()
+        timings.append((time.perf_counter() - began) * 1000)
+    return {
+        "queries": cold_queries,
+        "ms": round(statistics.median(timings), 2),
+    }
+
+
+def run_size(size, repeat):
+    old_name = connection.settings_dict["NAME"]
+    connection.settings_dict["TEST"]["NAME"] = os.path.join(
+        tempfile.mkdtemp(), f"bench_{size}.sqlite3"
+    )
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        # The signal handlers print a line per queued email.
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = Dataset(size)
+            return {
+                name: measure(send, prepare, repeat)
+                for name, send, prepare in scenarios(data)
+            }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def check(results, baselines, threshold, timing):
+    failures = []
+    for view, by_size in results.items():
+        small, large = by_size["small"], by_size["large"]
+        if large["queries"] > small["queries"]:
+            failures.append(
+                f"{view}: {small['queries']} queries on the small dataset but "
+                f"{large['queries']} on the large one"
+            )
+
+        for size, result in by_size.items():
+            baseline = baselines.get(view, {}).get(size)
+            if baseline is None:
+                continue
+            if result["queries"] > baseline["queries"]:
+                failures.append(
+                    f"{view} ({size}): {result['queries']} queries, "
+                    f"baseline {baseline['queries']}"
+                )
+            slower = result["ms"] - baseline["ms"]
+            if (
+                timing
+                and slower > MIN_REGRESSION_MS
+                and result["ms"] > baseline["ms"] * (1 + threshold)
+            ):
+                failures.append(
+                    f"{view} ({size}): {result['ms']:.1f} ms, "
+                    f"baseline {baseline['ms']:.1f} ms"
+                )
+    return failures
+
+
+def report(results, baselines):
+    width = max(len(view) for view in results)
+    print(
+        f"\n{'view':<{width}}  {'size':<6}  {'queries':>7}  {'base':>5}  "
+        f"{'ms':>8}  {'base':>8}"
+    )
+    for view, by_size in results.items():
+        for size, result in by_size.items():
+            baseline = baselines.get(view, {}).get(size, {})
+            print(
+                f"{view:<{width}}  {size:<6}  {result['queries']:>7}  "
+                f"{baseline.get('queries', '-'):>5}  {result['ms']:>8.2f}  "
+                f"{baseline.get('ms', '-'):>8}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--update", action="store_true", help="Rewrite the baselines")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.5,
+        help="Allowed slowdown over the baseline, as a fraction (default 0.5)",
+    )
+    parser.add_argument(
+        "--no-timing",
+        action="store_true",
+        help="Only gate query counts, e.g. on hardware unlike the baseline's",
+    )
+    args = parser.parse_args()
+
+    setup_test_environment()
+    by_size = {size: run_size(size, args.repeat) for size in SIZES}
+    results = {
+        view: {size: by_size[size][view] for size in SIZES} for view in by_size["small"]
+    }
+
+    baselines = json.loads(BASELINES.read_text())["views"] if BASELINES.exists() else {}
+    report(results, baselines)
+
+    if args.update:
+        BASELINES.write_text(
+            json.dumps({"sizes": SIZES, "views": results}, indent=2) + "\n"
+        )
+        print(f"\nWrote {BASELINES.name}.")
+        return
+
+    failures = check(results, baselines, args.threshold, not args.no_timing)
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
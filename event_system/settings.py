@@ -68,6 +68,8 @@ NPM_BIN_PATH = r"C:\Program Files\nodejs\npm.cmd"
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "events.instrumentation.InstrumentationMiddleware",
+    "events.querylog.QueryInspectionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -77,6 +79,53 @@ MIDDLEWARE = [
     "django_browser_reload.middleware.BrowserReloadMiddleware",
 ]
 
+# Request instrumentation
+#
+# The share of requests whose timings and queries are recorded; 0 turns it off.
+# Admins read the numbers at /events/dashboard/metrics/, and a scraper sending
+# "Authorization: Bearer <METRICS_TOKEN>" gets them in Prometheus format.
+
+INSTRUMENTATION_SAMPLE_RATE = config(
+    "INSTRUMENTATION_SAMPLE_RATE", default=0.1, cast=float
+)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Query inspection (development and staging)
+#
+# Warns when one query shape runs N_PLUS_ONE_THRESHOLD or more times in a
+# request, naming the template line or code that ran it, and logs queries
+# slower than SLOW_QUERY_MS with their plan to SLOW_QUERY_LOG, or the console
+# if that is empty.
+
+QUERY_INSPECTION = config("QUERY_INSPECTION", default=False, cast=bool)
+N_PLUS_ONE_THRESHOLD = config("N_PLUS_ONE_THRESHOLD", default=5, cast=int)
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", default=100, cast=float)
+SLOW_QUERY_LOG = config("SLOW_QUERY_LOG", default="")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "queries": {"class": "logging.StreamHandler", "formatter": "plain"},
+        "slow_queries": (
+            {
+                "class": "logging.FileHandler",
+                "filename": SLOW_QUERY_LOG,
+                "formatter": "plain",
+            }
+            if SLOW_QUERY_LOG
+            else {"class": "logging.StreamHandler", "formatter": "plain"}
+        ),
+    },
+    "loggers": {
+        "events.querylog.nplusone": {"handlers": ["queries"], "propagate": False},
+        "events.querylog.slow": {"handlers": ["slow_queries"], "propagate": False},
+    },
+}
+
 # if DEBUG:
 #     INSTALLED_APPS += ["debug_toolbar"]
 #     MIDDLEWARE += ["debug_toolbar.middleware.DebugToolbarMiddleware"]
@@ -94,6 +143,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "events.context_processors.viewer",
             ],
         },
     },
@@ -104,12 +154,126 @@ WSGI_APPLICATION = "event_system.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# SQLite unless DB_ENGINE=postgresql. Connections are kept for
+# DB_CONN_MAX_AGE seconds and checked before reuse. DB_POOL=True switches
+# PostgreSQL to psycopg's connection pool (pip install "psycopg[pool]").
+
+DB_ENGINE = config("DB_ENGINE", default="sqlite")
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", default=60, cast=int)
+SQLITE_MMAP_SIZE = config("SQLITE_MMAP_SIZE", default=256 * 2**20, cast=int)
+
+# Run on every new SQLite connection. The database itself is switched to
+# WAL, which lets readers carry on while one writer commits, once by
+# migration events 0011, since the journal mode is stored in the file.
+# synchronous=NORMAL skips an fsync per commit, which under WAL can lose the
+# last commits on power loss but never corrupts the file; mmap serves reads
+# straight from the OS page cache.
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+)
+
+if DB_ENGINE == "postgresql":
+    DB_POOL = config("DB_POOL", default=False, cast=bool)
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config("DB_NAME", default="event_system"),
+            "USER": config("DB_USER", default="postgres"),
+            "PASSWORD": config("DB_PASSWORD", default=""),
+            "HOST": config("DB_HOST", default="localhost"),
+            "PORT": config("DB_PORT", default="5432"),
+            # A pooled connection goes back to the pool after each request,
+            # so Django must not hold on to it as well.
+            "CONN_MAX_AGE": 0 if DB_POOL else DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": (
+                {
+                    "pool": {
+                        "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+                        "max_size": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+                        "timeout": config("DB_POOL_TIMEOUT", default=10, cast=float),
+                    }
+                }
+                if DB_POOL
+                else {}
+            ),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "init_command": "; ".join(SQLITE_PRAGMAS),
+                # Take the write lock at BEGIN, so a transaction that reads
+                # before it writes queues for the lock instead of failing
+                # with "database is locked" when it tries to upgrade.
+                "transaction_mode": "IMMEDIATE",
+                # Seconds a writer waits for the lock (SQLite's busy timeout).
+                "timeout": config("SQLITE_BUSY_TIMEOUT", default=20, cast=int),
+            },
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# "fragments" holds rendered event cards and table rows. It is process-local
+# by default; set FRAGMENT_CACHE_DIR to share it between worker processes.
+# "pages" holds whole home and event pages for anonymous visitors, fresh for
+# PAGE_CACHE_SECONDS unless an event or category on them changes first, and
+# then served for up to PAGE_CACHE_STALE_SECONDS more while one request
+# renders the replacement. PAGE_CACHE_DIR shares it the same way.
 
-DATABASES = {
+FRAGMENT_CACHE_DIR = config("FRAGMENT_CACHE_DIR", default="")
+PAGE_CACHE_DIR = config("PAGE_CACHE_DIR", default="")
+PAGE_CACHE_SECONDS = config("PAGE_CACHE_SECONDS", default=300, cast=int)
+PAGE_CACHE_STALE_SECONDS = config("PAGE_CACHE_STALE_SECONDS", default=30, cast=int)
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "default",
+    },
+    "fragments": {
+        "BACKEND": (
+            "django.core.cache.backends.filebased.FileBasedCache"
+            if FRAGMENT_CACHE_DIR
+            else "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": FRAGMENT_CACHE_DIR or "fragments",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    "pages": {
+        "BACKEND": (
+            "django.core.cache.backends.filebased.FileBasedCache"
+            if PAGE_CACHE_DIR
+            else "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": PAGE_CACHE_DIR or "pages",
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+}
+
+# Cache-Control for the public pages (home and event details), which also
+# answer conditional GETs with 304 Not Modified. The keys are arguments to
+# django.utils.cache.patch_cache_control. Anonymous pages may be stored by a
+# shared proxy, which revalidates once PUBLIC_PAGE_MAX_AGE seconds pass;
+# signed-in pages stay private and are revalidated on every view.
+
+PAGE_CACHE_CONTROL = {
+    "anonymous": {
+        "public": True,
+        "max_age": config("PUBLIC_PAGE_MAX_AGE", default=0, cast=int),
+    },
+    "authenticated": {"private": True, "no_cache": True},
 }
 
 
@@ -151,16 +315,49 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [
     BASE_DIR / "events" / "static",  # or wherever your static folder is
 ]
+STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# How events.media sends a file it has authorized: "" streams it from
+# Django, "nginx" hands it to an internal nginx location at
+# MEDIA_ACCEL_PREFIX through X-Accel-Redirect, and "sendfile" sets
+# X-Sendfile for Apache's mod_xsendfile or lighttpd. See deploy/nginx.conf.
+MEDIA_ACCEL = config("MEDIA_ACCEL", default="")
+MEDIA_ACCEL_PREFIX = config("MEDIA_ACCEL_PREFIX", default="/protected-media/")
+# Files without a content hash in their name, such as the default image.
+MEDIA_MAX_AGE = config("MEDIA_MAX_AGE", default=60 * 60, cast=int)
+
+# With STATIC_MANIFEST (the default when DEBUG is off), collectstatic names
+# every file after a hash of its contents and writes gzip and, when the
+# brotli package is installed, Brotli copies next to it. WhiteNoise serves
+# the compressed copy the browser accepts, and marks hashed names as
+# immutable with a ten-year max-age. "python run.py release" builds them.
+STATIC_MANIFEST = config("STATIC_MANIFEST", default=not DEBUG, cast=bool)
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "whitenoise.storage.CompressedManifestStaticFilesStorage"
+            if STATIC_MANIFEST
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Mail is queued in the outbox and sent by "manage.py send_outbox". For local
+# testing, point EMAIL_BACKEND at the console, locmem or filebased backend.
+EMAIL_BACKEND = config(
+    "EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_FILE_PATH = config("EMAIL_FILE_PATH", default=str(BASE_DIR / "sent_emails"))
 EMAIL_HOST = config("EMAIL_HOST")
 EMAIL_USE_TLS = config("EMAIL_USE_TLS", cast=bool)
 EMAIL_PORT = config("EMAIL_PORT")
@@ -1,8 +1,8 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from events.media import serve_media
 from events.views import home, dashboard
 from django.conf import settings
-from django.conf.urls.static import static
 from debug_toolbar.toolbar import debug_toolbar_urls
 
 urlpatterns = [
@@ -15,4 +15,10 @@ urlpatterns = [
 ] + debug_toolbar_urls()
 
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Served in production too: the view checks access and, with MEDIA_ACCEL,
+# leaves the transfer itself to the front-end server.
+urlpatterns += [
+    re_path(
+        rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.*)$", serve_media, name="media"
+    ),
+]
@@ -1,7 +1,20 @@
 from django.contrib import admin
 
 # Register your models here.
-from events.models import Event, Category
+from events.models import (
+    Event,
+    Category,
+    CategoryAffinity,
+    ImageJob,
+    Recommendation,
+    RecommendationRefresh,
+    WaitlistEntry,
+)
 
 admin.site.register(Event)
 admin.site.register(Category)
+admin.site.register(ImageJob)
+admin.site.register(WaitlistEntry)
+admin.site.register(CategoryAffinity)
+admin.site.register(Recommendation)
+admin.site.register(RecommendationRefresh)
@@ -0,0 +1,148 @@
+"""
+Conditional GET for the public pages. Each page's ETag and Last-Modified
+are worked out from updated_at stamps before the view runs, so a client or
+proxy holding a current copy gets a 304 without a single listing query or
+template render.
+"""
+
+import functools
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from events.context_processors import get_viewer
+from events.models import CatalogVersion, Event
+
+CACHEABLE = (200, 304)
+
+
+def _viewer_tag(request, rsvps=False):
+    # Authenticated pages show the user's name and roles in the header and
+    # carry their CSRF token in forms; listings also show their RSVPs.
+    user = request.user
+    if not user.is_authenticated:
+        return "anonymous"
+
+    viewer = get_viewer(request)
+    parts = [
+        user.pk,
+        user.get_username(),
+        user.get_full_name(),
+        user.email,
+        *viewer.group_names,
+        request.META.get("CSRF_COOKIE", ""),
+    ]
+    if rsvps:
+        parts += ["rsvps", *sorted(viewer.rsvp_event_ids)]
+        parts += ["waitlist", *sorted(viewer.waitlist_event_ids)]
+    return ":".join(map(str, parts))
+
+
+def _etag(*parts):
+    return hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+def _has_pending_messages(request):
+    # A 304 would leave flash messages unshown until some later page.
+    return len(get_messages(request)) > 0
+
+
+def catalog_state():
+    """
+    ``(token, last_modified)`` for the whole catalog, read from the
+    CatalogVersion row so every worker agrees. Database triggers bump it with
+    every write to an event or category, including the bulk paths that send
+    no signals and deletions.
+    """
+
+    # A flushed database has lost the row; the triggers only update it.
+    version, _ = CatalogVersion.objects.get_or_create(pk=1)
+    return f"{version.version}:{version.updated_at.isoformat()}", version.updated_at
+
+
+def request_catalog_state(request):
+    """catalog_state(), read once per request so all validators agree."""
+
+    if not hasattr(request, "_catalog_state"):
+        request._catalog_state = catalog_state()
+    return request._catalog_state
+
+
+def listing_etag(request, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    token, _ = request_catalog_state(request)
+    return _etag(token, _viewer_tag(request, rsvps=True))
+
+
+def listing_last_modified(request, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    _, last_modified = request_catalog_state(request)
+    return last_modified
+
+
+def requested_event(request, event_id):
+    """
+    The event with its category, or None, loaded once per request: the
+    validators read its stamps and, unless they answer 304, the view renders
+    the same instance.
+    """
+
+    cached = getattr(request, "_requested_event", None)
+    if cached is None or cached[0] != event_id:
+        event = Event.objects.select_related("category").filter(pk=event_id).first()
+        cached = request._requested_event = (event_id, event)
+    return cached[1]
+
+
+def event_etag(request, event_id, *args, **kwargs):
+    event = requested_event(request, event_id)
+    if event is None or _has_pending_messages(request):
+        return None
+    return _etag(
+        event.updated_at.isoformat(),
+        event.category.updated_at.isoformat(),
+        _viewer_tag(request),
+    )
+
+
+def event_last_modified(request, event_id, *args, **kwargs):
+    event = requested_event(request, event_id)
+    if event is None or _has_pending_messages(request):
+        return None
+    return max(event.updated_at, event.category.updated_at)
+
+
+def conditional_page(etag_func, last_modified_func):
+    """
+    Answer conditional GETs from ``etag_func`` and ``last_modified_func``
+    (see django.views.decorators.http.condition), and apply the
+    PAGE_CACHE_CONTROL policy for anonymous or authenticated viewers. The
+    response, 304 or not, varies on Cookie, since the session decides who
+    is viewing.
+    """
+
+    def decorator(view):
+        conditional_view = condition(etag_func, last_modified_func)(view)
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method not in ("GET", "HEAD"):
+                return response
+            if response.status_code in CACHEABLE:
+                if request.user.is_authenticated:
+                    policy = settings.PAGE_CACHE_CONTROL["authenticated"]
+                else:
+                    policy = settings.PAGE_CACHE_CONTROL["anonymous"]
+                patch_cache_control(response, **policy)
+                patch_vary_headers(response, ("Cookie",))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,56 @@
+from functools import cached_property
+
+from events.models import Event, WaitlistEntry
+from events.utils import get_user_groups
+
+CREATOR_GROUPS = frozenset({"Admin", "Organizer"})
+
+
+class Viewer:
+    """
+    What templates need to know about the current user, each part loaded at
+    most once per request and only if a template asks for it. Card grids
+    test membership against these sets instead of querying per card.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def groups(self):
+        return get_user_groups(self.user)
+
+    @cached_property
+    def group_names(self):
+        return sorted(self.groups)
+
+    @cached_property
+    def can_create_events(self):
+        return bool(self.groups & CREATOR_GROUPS)
+
+    @cached_property
+    def rsvp_event_ids(self):
+        if not self.user.is_authenticated:
+            return frozenset()
+        rsvps = Event.participants.through.objects.filter(user_id=self.user.pk)
+        return frozenset(rsvps.values_list("event_id", flat=True))
+
+    @cached_property
+    def waitlist_event_ids(self):
+        if not self.user.is_authenticated:
+            return frozenset()
+        entries = WaitlistEntry.objects.filter(user_id=self.user.pk).order_by()
+        return frozenset(entries.values_list("event_id", flat=True))
+
+
+def get_viewer(request):
+    """The request's Viewer, shared by the view and every template it renders."""
+
+    viewer = getattr(request, "_viewer", None)
+    if viewer is None:
+        viewer = request._viewer = Viewer(request.user)
+    return viewer
+
+
+def viewer(request):
+    return {"viewer": get_viewer(request)}
@@ -49,6 +49,7 @@ class EventForm(TailwindMixin, forms.ModelForm):
             "time",
             "location",
             "category",
+            "capacity",
             "image",
         ]
         widgets = {
@@ -83,6 +84,14 @@ class EventForm(TailwindMixin, forms.ModelForm):
         return image
 
 
+class EventImportForm(EventForm):
+    """EventForm's rules for one imported row; the importer resolves the
+    category and organizer itself."""
+
+    class Meta(EventForm.Meta):
+        fields = ["name", "description", "date", "time", "location", "capacity"]
+
+
 class CategoryForm(TailwindMixin, forms.ModelForm):
     class Meta:
         model = Category
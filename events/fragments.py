@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+
+FRAGMENT_CACHE = "fragments"
+EPOCH_KEY = "fragment_version:epoch"
+# Every listing shows the category picker, so depends on all category names.
+CATEGORIES_KEY = "fragment_version:categories"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[FRAGMENT_CACHE]
+
+
+def _new_version():
+    # A fresh token rather than a counter, so a version key that was evicted
+    # and recreated can never collide with a stale fragment.
+    return str(time.time_ns())
+
+
+def event_version_key(event_id):
+    return f"fragment_version:event:{event_id}"
+
+
+def category_version_key(category_id):
+    return f"fragment_version:category:{category_id}"
+
+
+def listing_version_key(category_id=None):
+    """
+    The version of which events a listing contains: the unfiltered one when
+    ``category_id`` is None, else the listing filtered to that category.
+    """
+    return f"fragment_version:listing:{category_id or 'all'}"
+
+
+def _bump(keys):
+    version = _new_version()
+    _cache().set_many({key: version for key in keys}, None)
+
+
+def bump_event_versions(*event_ids):
+    _bump(event_version_key(event_id) for event_id in event_ids)
+
+
+def bump_category_version(category_id):
+    _bump([category_version_key(category_id), CATEGORIES_KEY])
+
+
+def bump_listing_versions(*category_ids):
+    """An event joined or left the listings of these categories."""
+    keys = [listing_version_key(category_id) for category_id in category_ids]
+    _bump([listing_version_key(), *keys])
+
+
+def bump_all_versions():
+    """Invalidate every fragment, e.g. after a bulk update that sent no signals."""
+    _bump([EPOCH_KEY])
+
+
+def current_versions(keys):
+    """The version token of each key, minting any that are missing."""
+
+    cache = _cache()
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def fragment_key(name, event):
+    keys = [
+        event_version_key(event.pk),
+        category_version_key(event.category_id),
+        EPOCH_KEY,
+    ]
+    versions = current_versions(keys)
+    # updated_at also moves on writes made by other processes, whose bumps
+    # never reach a per-process fragment cache.
+    stamp = event.updated_at.isoformat()
+    return f"fragment:{name}:{event.pk}:{stamp}:" + ":".join(
+        versions[key] for key in keys
+    )
+
+
+def get_fragment(key):
+    html = _cache().get(key)
+    with _stats_lock:
+        _stats["hits" if html is not None else "misses"] += 1
+    return html
+
+
+def set_fragment(key, html):
+    _cache().set(key, html)
+
+
+def fragment_stats():
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
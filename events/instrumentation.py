@@ -0,0 +1,275 @@
+"""
+Per-view request instrumentation: wall time, database time, query count,
+duplicate queries and template render time for a sample of requests,
+aggregated in-process into fixed-bucket histograms.
+
+Each worker process keeps its own numbers; scrape every worker, or sum them
+in Prometheus.
+"""
+
+import bisect
+import contextlib
+import contextvars
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+# Upper bounds, in seconds for durations and in queries for query counts.
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+UNRESOLVED_VIEW = "<unresolved>"
+
+METRICS = {
+    # name: (buckets, help)
+    "request_duration_seconds": (TIME_BUCKETS, "Wall time spent in the view stack."),
+    "db_duration_seconds": (TIME_BUCKETS, "Time spent executing SQL."),
+    "template_duration_seconds": (TIME_BUCKETS, "Time spent rendering templates."),
+    "db_queries": (QUERY_BUCKETS, "SQL queries per request."),
+    "db_duplicate_queries": (
+        QUERY_BUCKETS,
+        "Queries per request repeating an earlier one with the same parameters.",
+    ),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One extra slot for values above the last bound.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """``(upper_bound, count)`` pairs as Prometheus expects them."""
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            yield bound, running
+
+    def quantile(self, q):
+        """The upper bound of the bucket holding quantile ``q``."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, running in self.cumulative():
+            if running >= rank:
+                return bound
+        return float("inf")
+
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.histograms = {}
+
+    def record(self, view, values):
+        with self.lock:
+            for name, value in values.items():
+                key = (name, view)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(METRICS[name][0])
+                self.histograms[key].observe(value)
+
+    def count(self, view):
+        with self.lock:
+            self.requests[view] += 1
+
+    def snapshot(self):
+        """A consistent copy, so readers never hold the lock while rendering."""
+        with self.lock:
+            histograms = {}
+            for key, histogram in self.histograms.items():
+                copy = Histogram(histogram.buckets)
+                copy.counts = list(histogram.counts)
+                copy.count, copy.sum = histogram.count, histogram.sum
+                histograms[key] = copy
+            return Counter(self.requests), histograms
+
+    def reset(self):
+        with self.lock:
+            self.requests.clear()
+            self.histograms.clear()
+
+
+registry = _Registry()
+
+
+class _Sample:
+    """What one sampled request has run up so far."""
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = Counter()
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # A connection.execute_wrapper: time every query and remember it.
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - began
+            self.queries[(sql, repr(params))] += 1
+
+
+_current = contextvars.ContextVar("instrumentation_sample", default=None)
+
+_wrapped_render = Template._render
+
+
+def _instrumented_render(self, context):
+    sample = _current.get()
+    if sample is None:
+        return _wrapped_render(self, context)
+
+    # Only the outermost template counts; included ones render inside it.
+    sample.template_depth += 1
+    began = time.perf_counter()
+    try:
+        return _wrapped_render(self, context)
+    finally:
+        sample.template_depth -= 1
+        if not sample.template_depth:
+            sample.template_time += time.perf_counter() - began
+
+
+def _install_template_timer():
+    # Wrap whatever is installed, e.g. the test runner's own instrumentation.
+    global _wrapped_render
+    if Template._render is not _instrumented_render:
+        _wrapped_render = Template._render
+        Template._render = _instrumented_render
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else UNRESOLVED_VIEW
+
+
+class InstrumentationMiddleware:
+    """
+    Records one in every ``1 / INSTRUMENTATION_SAMPLE_RATE`` requests; the
+    rest only bump a counter. A rate of 0 turns recording off.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        if self.sample_rate > 0:
+            _install_template_timer()
+
+    def __call__(self, request):
+        if not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            response = self.get_response(request)
+            registry.count(_view_name(request))
+            return response
+
+        sample = _Sample()
+        token = _current.set(sample)
+        began = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - began
+
+        view = _view_name(request)
+        total = sum(sample.queries.values())
+        registry.count(view)
+        registry.record(
+            view,
+            {
+                "request_duration_seconds": elapsed,
+                "db_duration_seconds": sample.db_time,
+                "template_duration_seconds": sample.template_time,
+                "db_queries": total,
+                "db_duplicate_queries": total - len(sample.queries),
+            },
+        )
+        return response
+
+
+def _ms(seconds):
+    return _count(seconds * 1000)
+
+
+def _count(value):
+    # JSON has no infinity; the overflow bucket shows as "+Inf".
+    return "+Inf" if value == float("inf") else round(value, 2)
+
+
+def metrics_summary():
+    """Per-view counts, means and bucketed p50/p95/p99, durations in ms."""
+
+    requests, histograms = registry.snapshot()
+    views = {}
+    for view, count in sorted(requests.items()):
+        entry = {"requests": count}
+        for name in METRICS:
+            histogram = histograms.get((name, view))
+            if histogram is None:
+                continue
+            scale = _ms if name.endswith("_seconds") else _count
+            entry[name.removesuffix("_seconds")] = {
+                "sampled": histogram.count,
+                "mean": scale(histogram.sum / histogram.count),
+                "p50": scale(histogram.quantile(0.5)),
+                "p95": scale(histogram.quantile(0.95)),
+                "p99": scale(histogram.quantile(0.99)),
+            }
+        views[view] = entry
+    return {"sample_rate": settings.INSTRUMENTATION_SAMPLE_RATE, "views": views}
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _bound(value):
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+def prometheus_text(prefix="event_system"):
+    """The same numbers in the Prometheus text exposition format."""
+
+    requests, histograms = registry.snapshot()
+    lines = [
+        f"# HELP {prefix}_requests_total Requests seen, sampled or not.",
+        f"# TYPE {prefix}_requests_total counter",
+    ]
+    lines += [
+        f'{prefix}_requests_total{{view="{_label(view)}"}} {count}'
+        for view, count in sorted(requests.items())
+    ]
+
+    for name, (_, help_text) in METRICS.items():
+        metric = f"{prefix}_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for (histogram_name, view), histogram in sorted(histograms.items()):
+            if histogram_name != name:
+                continue
+            label = f'view="{_label(view)}"'
+            lines += [
+                f'{metric}_bucket{{{label},le="{_bound(bound)}"}} {count}'
+                for bound, count in histogram.cumulative()
+            ]
+            lines.append(f"{metric}_sum{{{label}}} {histogram.sum!r}")
+            lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+    return "\n".join(lines) + "\n"
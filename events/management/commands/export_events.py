@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from events.transfer import CHUNK_SIZE, EXPORTERS
+
+
+class Command(BaseCommand):
+    help = "Stream every event and its RSVPs out as CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=sorted(EXPORTERS), default="csv", help="Output format"
+        )
+        parser.add_argument(
+            "--output", default="-", help="File to write, or - for stdout"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Events fetched from the database at a time",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        rows = EXPORTERS[options["format"]](chunk_size=max(1, options["chunk_size"]))
+        if path == "-":
+            for text in rows:
+                self.stdout.write(text, ending="")
+            return
+
+        with open(path, "w", newline="", encoding="utf-8") as stream:
+            for text in rows:
+                stream.write(text)
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate a deterministic synthetic dataset for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--events", type=int, default=200)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument(
+            "--organizers",
+            type=int,
+            help="How many of the users organize events (default: one in 20)",
+        )
+        parser.add_argument(
+            "--rsvps-per-user",
+            type=float,
+            default=5.0,
+            help="Mean number of events each participant RSVPs to",
+        )
+        parser.add_argument(
+            "--alpha",
+            type=float,
+            default=1.1,
+            help="Power-law exponent of event popularity (higher: hotter hot events)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--prefix",
+            default="synthetic",
+            help="Username and category prefix; must be new on every run",
+        )
+        parser.add_argument("--password", default="password123")
+
+    def handle(self, *args, **options):
+        try:
+            summary = generate(
+                users=options["users"],
+                events=options["events"],
+                categories=options["categories"],
+                organizers=options["organizers"],
+                rsvps_per_user=options["rsvps_per_user"],
+                alpha=options["alpha"],
+                seed=options["seed"],
+                prefix=options["prefix"],
+                password=options["password"],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {summary['categories']} categories, "
+                f"{summary['organizers']} organizers, "
+                f"{summary['participants']} participants, "
+                f"{summary['events']} events and {summary['rsvps']} RSVPs. "
+                f"Hottest event: {summary['hottest_event_rsvps']} RSVPs, "
+                f"median: {summary['median_event_rsvps']}."
+            )
+        )
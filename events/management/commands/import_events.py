@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.transfer import CHUNK_SIZE, READERS, import_events
+
+MAX_REPORTED_ERRORS = 50
+
+
+class Command(BaseCommand):
+    help = "Bulk load events and RSVPs from a CSV or JSON Lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, or - for stdin")
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="Input format (default: taken from the file extension)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Rows validated and written per transaction",
+        )
+        parser.add_argument(
+            "--create-categories",
+            action="store_true",
+            help="Create categories that do not exist yet instead of rejecting rows",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate every row without writing anything",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options["format"] or Path(path).suffix.lstrip(".").lower()
+        if format not in READERS:
+            raise CommandError("Cannot tell the format; pass --format csv or jsonl.")
+
+        if path == "-":
+            stream = sys.stdin
+        else:
+            stream = open(path, newline="", encoding="utf-8-sig")
+        try:
+            report = import_events(
+                stream,
+                format,
+                chunk_size=max(1, options["chunk_size"]),
+                create_categories=options["create_categories"],
+                dry_run=options["dry_run"],
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        errors = report["errors"]
+        for line, message in errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(f"line {line}: {message}")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(f"... and {len(errors) - MAX_REPORTED_ERRORS} more")
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {report['events']} event(s) with "
+                f"{report['participants']} RSVP(s); skipped {len(errors)} row(s)."
+            )
+        )
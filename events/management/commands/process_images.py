@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from events.tasks import enqueue_missing_variants, run_workers
+
+
+class Command(BaseCommand):
+    help = "Run background workers that optimize uploaded event images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=2, help="Number of worker threads"
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever",
+        )
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Queue events whose images have no responsive variants yet",
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            queued = enqueue_missing_variants()
+            self.stdout.write(f"Queued {queued} event image(s) for variants.")
+
+        workers = max(1, options["workers"])
+        self.stdout.write(f"Starting {workers} image worker(s)...")
+
+        processed = run_workers(
+            workers=workers,
+            poll_interval=options["poll_interval"],
+            once=options["once"],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} image job(s)."))
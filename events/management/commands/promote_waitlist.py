@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from events.rsvp import promote_waitlist
+
+
+class Command(BaseCommand):
+    help = "Move waitlisted users into every free seat, oldest first"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "events",
+            nargs="*",
+            type=int,
+            help="Only promote these event ids (default: all events)",
+        )
+
+    def handle(self, *args, **options):
+        promoted = promote_waitlist(options["events"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Promoted {promoted} user(s)."))
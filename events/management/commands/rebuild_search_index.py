@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from events.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for events"
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} event(s)."))
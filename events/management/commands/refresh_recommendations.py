@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from events.recommendations import refresh_user
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute category affinities and recommended events, e.g. nightly, "
+        "so scores follow RSVP counts and lists shed past events"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "users",
+            nargs="*",
+            type=int,
+            help="Only refresh these user ids (default: every active user)",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options["users"]:
+            users = users.filter(pk__in=options["users"])
+
+        today = timezone.now().date()
+        refreshed = 0
+        for user_id in users.values_list("pk", flat=True).iterator():
+            refresh_user(user_id, today)
+            refreshed += 1
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} user(s)."))
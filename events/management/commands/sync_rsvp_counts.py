@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from events.fragments import bump_all_versions
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = "Backfill or reconcile the stored RSVP count of every event"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report events whose stored count is out of date",
+        )
+
+    def handle(self, *args, **options):
+        drifted = Event.objects.with_actual_rsvp_count().exclude(
+            rsvp_count=F("actual_rsvp_count")
+        )
+
+        if options["check"]:
+            for event in drifted:
+                self.stdout.write(
+                    f"{event.pk}: {event.name} stored={event.rsvp_count} "
+                    f"actual={event.actual_rsvp_count}"
+                )
+            self.stdout.write(f"{len(drifted)} event(s) out of date.")
+            return
+
+        updated = Event.objects.sync_rsvp_counts()
+        bump_all_versions()
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} event(s)."))
@@ -0,0 +1,187 @@
+"""
+Serving of uploaded media. The view decides whether the visitor may read a
+file and which caching headers it gets, then either hands the transfer to the
+front-end server (MEDIA_ACCEL) or sends the file itself, answering
+conditional and Range requests.
+"""
+
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from events.utils import HASHED_NAME
+
+# Directories under MEDIA_ROOT shown on public pages, and the image events
+# fall back to. Anything else is only served to staff.
+PUBLIC_DIRS = ("events_img/",)
+PUBLIC_FILES = ("default.webp",)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_UNSATISFIABLE = object()
+
+
+def _is_public(name):
+    return name in PUBLIC_FILES or name.startswith(PUBLIC_DIRS)
+
+
+def _may_read(request, name):
+    if posixpath.basename(name).startswith(".") or name.endswith(".tmp"):
+        return False
+    return _is_public(name) or request.user.is_staff
+
+
+def _cache_control(name):
+    if not _is_public(name):
+        return "private, no-cache"
+    if HASHED_NAME.search(name):
+        # The optimizer names files after their contents.
+        return f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={settings.MEDIA_MAX_AGE}"
+
+
+def _etag(stat):
+    # The format nginx uses, so validators agree once it serves the file.
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def _byte_range(request, size, etag, last_modified):
+    """
+    The (start, end) byte positions, inclusive, of a single-range request,
+    _UNSATISFIABLE, or None to send the whole file. Multiple ranges and
+    malformed headers are ignored, as RFC 9110 allows.
+    """
+
+    match = _RANGE.match(request.headers.get("Range", "").replace(" ", ""))
+    if not match or not any(match.groups()):
+        return None
+
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range != etag:
+        if parse_http_date_safe(if_range) != last_modified:
+            # The client's partial copy is outdated; it needs the whole file.
+            return None
+
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if not length or not size:
+            return _UNSATISFIABLE
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and start > end:
+        return None
+    if start >= size:
+        return _UNSATISFIABLE
+    return start, min(end, size - 1)
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offloaded(name, path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_ACCEL == "nginx":
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+    else:
+        response["X-Sendfile"] = path
+    return response
+
+
+def _file_response(request, path, stat, content_type, etag, last_modified):
+    byte_range = _byte_range(request, stat.st_size, etag, last_modified)
+
+    if byte_range is _UNSATISFIABLE:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+        return response
+
+    if byte_range is None:
+        if request.method == "HEAD":
+            response = HttpResponse(content_type=content_type)
+        else:
+            # Servers with wsgi.file_wrapper send this with sendfile().
+            response = FileResponse(open(path, "rb"), content_type=content_type)
+        response["Content-Length"] = stat.st_size
+        return response
+
+    start, end = byte_range
+    length = end - start + 1
+    if request.method == "HEAD":
+        response = HttpResponse(status=206, content_type=content_type)
+    else:
+        response = StreamingHttpResponse(
+            _read_range(path, start, length), status=206, content_type=content_type
+        )
+    response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    response["Content-Length"] = length
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Send the file at ``path`` under MEDIA_ROOT, if the visitor may read it.
+
+    With MEDIA_ACCEL set to "nginx" or "sendfile" the front-end server
+    transfers the file through X-Accel-Redirect or X-Sendfile; otherwise it
+    is sent from here. Unknown and forbidden files both answer 404, so the
+    response does not tell which files exist.
+    """
+
+    name = posixpath.normpath(path).lstrip("/")
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404("Media file not found")
+    if not _may_read(request, name) or not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+
+    stat = os.stat(full_path)
+    etag = _etag(stat)
+    last_modified = int(stat.st_mtime)
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        if settings.MEDIA_ACCEL:
+            response = _offloaded(name, full_path, content_type)
+        else:
+            response = _file_response(
+                request, full_path, stat, content_type, etag, last_modified
+            )
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = _cache_control(name)
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_image_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(max_length=10)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('file', models.FileField(max_length=255, upload_to='')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='events.event')),
+            ],
+            options={
+                'ordering': ['format', 'width'],
+                'constraints': [models.UniqueConstraint(fields=('event', 'format', 'width'), name='unique_event_variant')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_rsvp_count(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    rows = (
+        Event.participants.through.objects.filter(event_id=OuterRef("pk"))
+        .order_by()
+        .values("event_id")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    Event.objects.update(rsvp_count=Coalesce(Subquery(rows), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='rsvp_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rsvp_count, migrations.RunPython.noop),
+    ]
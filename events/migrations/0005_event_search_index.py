@@ -0,0 +1,41 @@
+from django.db import migrations
+
+FTS_TABLE = "events_event_fts"
+
+CREATE_FTS_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    name, description, location, category,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+REBUILD_FTS_SQL = f"""
+INSERT INTO {FTS_TABLE} (rowid, name, description, location, category)
+SELECT e.id, e.name, e.description, e.location, c.name
+FROM events_event e JOIN events_category c ON c.id = e.category_id
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE_FTS_SQL)
+    schema_editor.execute(REBUILD_FTS_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_rsvp_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def rename_duplicate_categories(apps, schema_editor):
+    # Category names become unique; keep every row but give repeated names
+    # a numeric suffix so the constraint can be added. A suffixed name is
+    # checked against every existing name, not only those seen so far, so
+    # it cannot collide with a category further down the table.
+    Category = apps.get_model("events", "Category")
+    categories = list(Category.objects.order_by("id"))
+    taken = {category.name for category in categories}
+    kept = set()
+    for category in categories:
+        if category.name not in kept:
+            kept.add(category.name)
+            continue
+
+        suffix = 2
+        name = f"{category.name[:45]} {suffix}"
+        while name in taken:
+            suffix += 1
+            name = f"{category.name[:45]} {suffix}"
+        taken.add(name)
+        category.name = name
+        category.save(update_fields=["name"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_categories, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='events.category'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='created_by',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_events', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'time', 'id'], name='event_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['created_by', 'date'], name='event_creator_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['category', 'date', 'time', 'id'], name='event_category_date_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+# The journal mode is stored in the database file, so it is switched once
+# here rather than by every connection's init_command (see settings.py).
+# SQLite cannot change it inside a transaction, hence atomic = False.
+def enable_wal(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode = WAL")
+
+
+def disable_wal(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode = DELETE")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('events', '0010_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_wal, disable_wal),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+PG_VECTOR_COLUMN = "search_vector"
+PG_VECTOR_INDEX = "events_event_search_vector_gin"
+
+PG_UPDATE_VECTORS_SQL = f"""
+UPDATE events_event e SET {PG_VECTOR_COLUMN} =
+    setweight(to_tsvector(e.name), 'A')
+    || setweight(to_tsvector(c.name), 'B')
+    || setweight(to_tsvector(e.location), 'C')
+    || setweight(to_tsvector(e.description), 'D')
+FROM events_category c
+WHERE c.id = e.category_id
+"""
+
+
+# The column is kept out of the model, which SQLite shares: there the
+# FTS5 table from 0005 plays the same part.
+def create_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"ALTER TABLE events_event ADD COLUMN IF NOT EXISTS {PG_VECTOR_COLUMN} tsvector"
+    )
+    schema_editor.execute(PG_UPDATE_VECTORS_SQL)
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {PG_VECTOR_INDEX}"
+        f" ON events_event USING gin ({PG_VECTOR_COLUMN})"
+    )
+
+
+def drop_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {PG_VECTOR_INDEX}")
+    schema_editor.execute(
+        f"ALTER TABLE events_event DROP COLUMN IF EXISTS {PG_VECTOR_COLUMN}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0011_sqlite_wal'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vectors, drop_search_vectors),
+    ]
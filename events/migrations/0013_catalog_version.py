@@ -0,0 +1,94 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+CATALOG_TABLES = ("events_event", "events_category")
+SQLITE_EVENTS = ("INSERT", "UPDATE", "DELETE")
+
+SQLITE_BUMP_SQL = """
+UPDATE events_catalogversion
+SET version = version + 1, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+WHERE id = 1
+"""
+
+PG_BUMP_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION events_bump_catalog_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE events_catalogversion
+    SET version = version + 1, updated_at = now()
+    WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def _trigger_name(table, event="ALL"):
+    return f"{table}_catalog_version_{event.lower()}"
+
+
+def create_version_row(apps, schema_editor):
+    CatalogVersion = apps.get_model("events", "CatalogVersion")
+    CatalogVersion.objects.using(schema_editor.connection.alias).get_or_create(pk=1)
+
+
+# The triggers bump the row in the same transaction as the write, so bulk
+# updates, raw SQL and other workers' writes all change the version and
+# readers need a single primary-key lookup instead of aggregating the tables.
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for table in CATALOG_TABLES:
+            for event in SQLITE_EVENTS:
+                schema_editor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {_trigger_name(table, event)}"
+                    f" AFTER {event} ON {table}"
+                    f" BEGIN {SQLITE_BUMP_SQL}; END",
+                    # No parameters, so the strftime() format is left alone.
+                    params=None,
+                )
+    elif vendor == "postgresql":
+        schema_editor.execute(PG_BUMP_FUNCTION_SQL)
+        for table in CATALOG_TABLES:
+            schema_editor.execute(
+                f"CREATE TRIGGER {_trigger_name(table)}"
+                f" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}"
+                " FOR EACH STATEMENT EXECUTE FUNCTION events_bump_catalog_version()"
+            )
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for table in CATALOG_TABLES:
+            for event in SQLITE_EVENTS:
+                schema_editor.execute(
+                    f"DROP TRIGGER IF EXISTS {_trigger_name(table, event)}"
+                )
+    elif vendor == "postgresql":
+        for table in CATALOG_TABLES:
+            schema_editor.execute(
+                f"DROP TRIGGER IF EXISTS {_trigger_name(table)} ON {table}"
+            )
+        schema_editor.execute("DROP FUNCTION IF EXISTS events_bump_catalog_version()")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_event_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
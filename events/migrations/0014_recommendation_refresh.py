@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('events', '0013_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationRefresh',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation_refresh', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,19 +1,48 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
-from .utils import optimize_image_for_web
+from django.utils import timezone
 
 # Create your models here.
 
 
 class Category(models.Model):
-    name = models.CharField(max_length=50)
+    name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 
+class EventQuerySet(models.QuerySet):
+    def _participant_count(self):
+        rows = (
+            Event.participants.through.objects.filter(event_id=OuterRef("pk"))
+            .order_by()
+            .values("event_id")
+            .annotate(total=Count("*"))
+            .values("total")
+        )
+        return Coalesce(Subquery(rows), 0)
+
+    def with_actual_rsvp_count(self):
+        return self.annotate(actual_rsvp_count=self._participant_count())
+
+    def sync_rsvp_counts(self):
+        """Recompute rsvp_count from the participants table in one UPDATE."""
+        return self.update(
+            rsvp_count=self._participant_count(), updated_at=timezone.now()
+        )
+
+
 class Event(models.Model):
+    class ImageStatus(models.TextChoices):
+        PENDING = "pending", "Pending"
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
     name = models.CharField(max_length=100)
     description = models.TextField()
     date = models.DateField()
@@ -21,10 +50,19 @@ class Event(models.Model):
     image = models.ImageField(
         upload_to="events_img", default="default.webp", blank=True
     )
+    image_status = models.CharField(
+        max_length=10, choices=ImageStatus.choices, default=ImageStatus.READY
+    )
     participants = models.ManyToManyField(User, related_name="rsvp_events", blank=True)
+    rsvp_count = models.PositiveIntegerField(default=0, editable=False)
+    capacity = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Leave empty for unlimited seats."
+    )
     location = models.CharField(max_length=200)
+    # The composite indexes in Meta lead with these columns, so the default
+    # single-column FK indexes would only add write cost.
     category = models.ForeignKey(
-        Category, on_delete=models.CASCADE, related_name="events"
+        Category, on_delete=models.CASCADE, related_name="events", db_index=False
     )
     created_by = models.ForeignKey(
         User,
@@ -32,16 +70,203 @@ class Event(models.Model):
         related_name="created_events",
         null=True,
         blank=True,
+        db_index=False,
     )
+    # auto_now only covers save(); queryset updates that change what the
+    # event page shows, such as rsvp_count, set it themselves.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Listing order and keyset pagination, plus date/date-range filters.
+            models.Index(fields=["date", "time", "id"], name="event_date_time_idx"),
+            # Organizer dashboard: created_by filtered by date.
+            models.Index(fields=["created_by", "date"], name="event_creator_date_idx"),
+            # Category filter on the home page, in listing order.
+            models.Index(
+                fields=["category", "date", "time", "id"],
+                name="event_category_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def image_ready(self):
+        return self.image_status == self.ImageStatus.READY
+
+    @property
+    def is_full(self):
+        return self.capacity is not None and self.rsvp_count >= self.capacity
+
     def save(self, *args, **kwargs):
+        # A freshly uploaded file is stored as-is and handed to the image
+        # workers; the optimized WebP replaces it once it has been encoded.
+        image_uploaded = bool(self.image) and not self.image._committed
+        if image_uploaded:
+            self.image_status = self.ImageStatus.PENDING
 
         super().save(*args, **kwargs)
 
-        if self.image:
-            success = optimize_image_for_web(self.image)
-            if success:
-                super().save(update_fields=["image"])
+        if image_uploaded:
+            ImageJob.objects.create(event=self, image_name=self.image.name)
+
+
+class ImageJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSING = "processing", "Processing"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="image_jobs"
+    )
+    image_name = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.image_name} ({self.status})"
+
+
+class EventImageVariant(models.Model):
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="image_variants"
+    )
+    format = models.CharField(max_length=10)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.FileField(max_length=255)
+
+    class Meta:
+        ordering = ["format", "width"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "format", "width"], name="unique_event_variant"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.width}w {self.format}"
+
+
+class WaitlistEntry(models.Model):
+    # The unique constraint and the queue index both lead with event.
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="waitlist", db_index=False
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="waitlist_entries"
+    )
+    joined_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["joined_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "user"], name="unique_waitlist_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["event", "joined_at", "id"], name="waitlist_queue_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} waiting for {self.event}"
+
+
+class CategoryAffinity(models.Model):
+    """A user's share of their RSVPs that fell in one of their top categories."""
+
+    # The unique constraint leads with user.
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="category_affinities",
+        db_index=False,
+    )
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="affinities"
+    )
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "category"], name="unique_category_affinity"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} likes {self.category} ({self.score:.2f})"
+
+
+class Recommendation(models.Model):
+    """One of a user's precomputed top candidate events."""
+
+    # The unique constraint and the ranking index both lead with user.
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="recommendations", db_index=False
+    )
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="recommendations"
+    )
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "event"], name="unique_recommendation"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["user", "-score"], name="recommendation_rank_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.event} for {self.user} ({self.score:.2f})"
+
+
+class RecommendationRefresh(models.Model):
+    """When a user's recommendation list was last computed, even if empty."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="recommendation_refresh",
+    )
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user} refreshed {self.refreshed_at:%Y-%m-%d %H:%M}"
+
+
+class CatalogVersion(models.Model):
+    """
+    A single row that changes whenever any event or category does. Database
+    triggers (migration 0013) bump it inside the writing transaction, so
+    bulk updates, imports and other workers' writes all count.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"catalog v{self.version}"
@@ -0,0 +1,206 @@
+"""
+Whole-page cache for anonymous GETs of the public pages.
+
+Each entry records the version of everything it shows, from the version
+stamps in events.fragments, so signals invalidate exactly the pages an event
+or category appears on. It also records the catalog state from the database,
+which catches writes that this process's version stamps never heard of. Only
+one request per page re-renders a missing or outdated entry. Meanwhile the
+others get the previous copy, or wait briefly for the first render when there
+is none.
+"""
+
+import functools
+import hashlib
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse, QueryDict
+from django.middleware.csrf import get_token
+
+from events.conditional import request_catalog_state
+from events.fragments import EPOCH_KEY, current_versions
+
+PAGE_CACHE = "pages"
+
+# The only query parameters the public pages read; anything else is dropped
+# before rendering, so it cannot split the cache or leak into a cached page.
+PAGE_PARAMS = ("query", "category", "start_date", "end_date", "cursor")
+
+# How long one request may hold a page's render lock, and how long others
+# wait for a page that has never been rendered before rendering it too.
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+
+# Forms on the page carry the renderer's CSRF token. It is cut out of the
+# stored copy and each visitor's own token is put back when it is served.
+_CSRF_INPUT = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+_CSRF_HOLE = b"<csrf-token>"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[PAGE_CACHE]
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def page_cache_stats():
+    with _stats_lock:
+        hits, stale, misses = _stats["hits"], _stats["stale"], _stats["misses"]
+    total = hits + stale + misses
+    return {
+        "hits": hits,
+        "stale": stale,
+        "misses": misses,
+        "hit_ratio": round((hits + stale) / total, 4) if total else None,
+    }
+
+
+def depends_on(request, *version_keys):
+    """
+    Declare version keys (see events.fragments) that the page being
+    rendered shows. A no-op unless the page is being rendered for the cache.
+    """
+
+    dependencies = getattr(request, "_page_dependencies", None)
+    if dependencies is not None:
+        dependencies.update(version_keys)
+
+
+def _normalized_params(request):
+    params = QueryDict(mutable=True)
+    for name in PAGE_PARAMS:
+        value = " ".join(request.GET.get(name, "").split())
+        if value:
+            params[name] = value
+    params._mutable = False
+    return params
+
+
+def _page_key(request):
+    url = f"{request.path}?{request.GET.urlencode()}"
+    return f"page:{hashlib.sha256(url.encode()).hexdigest()}"
+
+
+def _cacheable_request(request):
+    return (
+        request.method == "GET"
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def _cacheable_response(request, response):
+    # A page that set a cookie or touched the session belongs to one visitor.
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.session.modified
+    )
+
+
+def _is_fresh(request, entry):
+    if entry["fresh_until"] < time.time():
+        return False
+    # The catalog state comes from the database, so a change handled by
+    # another worker, whose version bumps this process never saw, counts.
+    catalog, _ = request_catalog_state(request)
+    if entry["catalog"] != catalog:
+        return False
+    return current_versions(list(entry["versions"])) == entry["versions"]
+
+
+def _response(request, entry):
+    content = entry["content"]
+    if _CSRF_HOLE in content:
+        content = content.replace(_CSRF_HOLE, get_token(request).encode())
+    return HttpResponse(
+        content, status=entry["status"], content_type=entry["content_type"]
+    )
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = _cache().get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _render(request, key, view, args, kwargs):
+    request._page_dependencies = {EPOCH_KEY}
+    catalog, _ = request_catalog_state(request)
+    response = view(request, *args, **kwargs)
+    if not _cacheable_response(request, response):
+        return response
+
+    versions = current_versions(list(request._page_dependencies))
+    # The catalog version was read before the view ran, so a change that
+    # lands mid-render makes the next hit see a mismatch and render again.
+    entry = {
+        "content": _CSRF_INPUT.sub(rb"\1" + _CSRF_HOLE + rb"\2", response.content),
+        "status": response.status_code,
+        "content_type": response["Content-Type"],
+        "versions": versions,
+        "catalog": catalog,
+        "fresh_until": time.time() + settings.PAGE_CACHE_SECONDS,
+    }
+    timeout = settings.PAGE_CACHE_SECONDS + settings.PAGE_CACHE_STALE_SECONDS
+    _cache().set(key, entry, timeout)
+    return response
+
+
+def cache_anonymous_page(view):
+    """
+    Serve anonymous GETs of ``view`` from the page cache. The view reports
+    what the page shows through depends_on(); any change to those versions,
+    or PAGE_CACHE_SECONDS passing, sends the next request to re-render it.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _cacheable_request(request):
+            return view(request, *args, **kwargs)
+
+        request.GET = _normalized_params(request)
+        key = _page_key(request)
+        entry = _cache().get(key)
+        if entry is not None and _is_fresh(request, entry):
+            _count("hits")
+            return _response(request, entry)
+
+        lock = f"{key}:lock"
+        if not _cache().add(lock, True, LOCK_TIMEOUT):
+            # Someone else is rendering this page.
+            if entry is not None:
+                _count("stale")
+                return _response(request, entry)
+            entry = _wait_for(key)
+            if entry is not None:
+                _count("hits")
+                return _response(request, entry)
+            _count("misses")
+            return _render(request, key, view, args, kwargs)
+
+        _count("misses")
+        try:
+            return _render(request, key, view, args, kwargs)
+        finally:
+            _cache().delete(lock)
+
+    return wrapper
@@ -0,0 +1,131 @@
+import base64
+import datetime
+import json
+
+from django.db.models import Q
+
+PAGE_SIZE = 12
+DATE_ORDERING = ("date", "time", "id")
+RANK_ORDERING = ("search_rank", "id")
+
+_DECODERS = {
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "search_rank": float,
+    "id": int,
+}
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _encode_cursor(direction, obj, ordering):
+    payload = [direction] + [_encode_value(getattr(obj, field)) for field in ordering]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(token, ordering):
+    if not token:
+        return None
+
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, *values = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ("after", "before") or len(values) != len(ordering):
+            return None
+        return direction, [
+            _DECODERS[field](value) for field, value in zip(ordering, values)
+        ]
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def _seek(direction, ordering, values):
+    # (a, b, c) > (x, y, z)  <=>  a > x  OR  (a = x AND b > y)  OR  ...
+    # The redundant "a >= x" bound lets the database seek into the index on
+    # the leading column instead of scanning it from the start.
+    op = "gt" if direction == "after" else "lt"
+    condition = Q()
+    for i, field in enumerate(ordering):
+        equal = {prev: values[j] for j, prev in enumerate(ordering[:i])}
+        condition |= Q(**equal, **{f"{field}__{op}": values[i]})
+    return Q(**{f"{ordering[0]}__{op}e": values[0]}) & condition
+
+
+class KeysetPage:
+    def __init__(self, object_list, params, param, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._params = params
+        self._param = param
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def _query(self, cursor):
+        params = self._params.copy()
+        params[self._param] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query(self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self._query(self.previous_cursor)
+
+
+def paginate_events(
+    request, queryset, per_page=PAGE_SIZE, ordering=DATE_ORDERING, param="cursor"
+):
+    """
+    Return one page of events using keyset (seek) pagination over
+    ``ordering`` (by default date, time, id), so the cost of a page does not
+    depend on its depth.
+
+    The cursor is an opaque token in ``request.GET[param]``; every other
+    query parameter (search and filters) is carried over to the links.
+    """
+
+    cursor = _decode_cursor(request.GET.get(param, ""), ordering)
+
+    if cursor is None:
+        rows = list(queryset.order_by(*ordering)[: per_page + 1])
+        has_next, has_previous = len(rows) > per_page, False
+        rows = rows[:per_page]
+    elif cursor[0] == "after":
+        seek = _seek("after", ordering, cursor[1])
+        rows = list(queryset.filter(seek).order_by(*ordering)[: per_page + 1])
+        has_next, has_previous = len(rows) > per_page, True
+        rows = rows[:per_page]
+    else:
+        seek = _seek("before", ordering, cursor[1])
+        descending = [f"-{field}" for field in ordering]
+        rows = list(queryset.filter(seek).order_by(*descending)[: per_page + 1])
+        has_next, has_previous = True, len(rows) > per_page
+        rows = rows[:per_page][::-1]
+
+    next_cursor = (
+        _encode_cursor("after", rows[-1], ordering) if rows and has_next else None
+    )
+    previous_cursor = (
+        _encode_cursor("before", rows[0], ordering) if rows and has_previous else None
+    )
+
+    return KeysetPage(rows, request.GET, param, next_cursor, previous_cursor)
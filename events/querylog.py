@@ -0,0 +1,199 @@
+"""
+Opt-in query inspection for development and staging: flags N+1 patterns,
+i.e. one query shape run again and again within a request, and logs slow
+queries together with their query plan.
+
+Turn it on with QUERY_INSPECTION=True. N+1 reports go to the
+``events.querylog.nplusone`` logger and slow queries to
+``events.querylog.slow``; see LOGGING in settings.
+"""
+
+import contextlib
+import logging
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+
+nplusone_log = logging.getLogger("events.querylog.nplusone")
+slow_log = logging.getLogger("events.querylog.slow")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+# Project modules that only wrap other code, so never the origin of a query.
+_WRAPPERS = {
+    str(Path(__file__).resolve()),
+    str(Path(__file__).resolve().with_name("instrumentation.py")),
+}
+
+
+def fingerprint(sql):
+    """
+    The shape of ``sql`` with literals and placeholder lists collapsed, so
+    ``WHERE id = 1`` and ``WHERE id = 2``, or ``IN (%s, %s)`` and
+    ``IN (%s)``, count as the same query.
+    """
+
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def _template_origin(frame):
+    # Template nodes render through Node.render_annotated; the innermost one
+    # on the stack is the tag or variable that ran the query.
+    while frame is not None:
+        if frame.f_code.co_name == "render_annotated":
+            node = frame.f_locals.get("self")
+            origin = getattr(node, "origin", None)
+            token = getattr(node, "token", None)
+            if origin is not None and token is not None:
+                name = origin.template_name or origin.name
+                return f"{name}:{token.lineno}"
+        frame = frame.f_back
+    return None
+
+
+def _python_origin(frame):
+    # The innermost frame in project code, skipping Django and the wrappers.
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_PROJECT_DIR)
+            and filename not in _WRAPPERS
+            and "site-packages" not in filename
+        ):
+            relative = Path(filename).relative_to(_PROJECT_DIR)
+            return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+def origin():
+    """Where the current query came from: the template line, then Python."""
+
+    frame = sys._getframe(1)
+    python = _python_origin(frame)
+    template = _template_origin(frame)
+    return f"{template} (via {python})" if template else python
+
+
+class QueryInspector:
+    """
+    A ``connection.execute_wrapper`` that counts queries by fingerprint and
+    explains the slow ones. Use one per request or unit of work.
+    """
+
+    def __init__(self, threshold=None, slow_ms=None):
+        self.threshold = threshold or settings.N_PLUS_ONE_THRESHOLD
+        self.slow_ms = settings.SLOW_QUERY_MS if slow_ms is None else slow_ms
+        self.counts = Counter()
+        self.origins = defaultdict(Counter)
+        self.examples = {}
+        self._explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explaining:
+            return execute(sql, params, many, context)
+
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - began) * 1000
+            shape = fingerprint(sql)
+            self.counts[shape] += 1
+            # The first run of a shape is never the problem; only trace repeats.
+            if self.counts[shape] == 1:
+                self.examples[shape] = sql
+            else:
+                self.origins[shape][origin()] += 1
+            if elapsed_ms >= self.slow_ms:
+                self._log_slow(context["connection"], sql, params, many, elapsed_ms)
+
+    def _log_slow(self, connection, sql, params, many, elapsed_ms):
+        plan = self._explain(connection, sql, params) if not many else None
+        slow_log.warning(
+            "Slow query (%.1f ms) at %s\n%s\nparams: %r\nplan:\n%s",
+            elapsed_ms,
+            origin(),
+            sql,
+            params,
+            plan or "(not explained)",
+        )
+
+    def _explain(self, connection, sql, params):
+        if not sql.lstrip().upper().startswith("SELECT"):
+            return None
+        prefix = connection.ops.explain_query_prefix()
+        self._explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {sql}", params)
+                return "\n".join(
+                    " ".join(str(column) for column in row)
+                    for row in cursor.fetchall()
+                )
+        except DatabaseError as e:
+            return f"EXPLAIN failed: {e}"
+        finally:
+            self._explaining = False
+
+    def repeated(self):
+        """``(fingerprint, count)`` for shapes run at least ``threshold`` times."""
+        return [
+            (shape, count)
+            for shape, count in self.counts.most_common()
+            if count >= self.threshold
+        ]
+
+    def report(self, label):
+        for shape, count in self.repeated():
+            origins = "\n".join(
+                f"    {n}x {where}" for where, n in self.origins[shape].most_common(5)
+            )
+            nplusone_log.warning(
+                "Possible N+1 in %s: %d runs of\n  %s\n  e.g. %s\n  from:\n%s",
+                label,
+                count,
+                shape,
+                self.examples[shape],
+                origins,
+            )
+
+
+@contextlib.contextmanager
+def inspect_queries(label, threshold=None, slow_ms=None):
+    """Inspect every query on every connection until the block exits."""
+
+    inspector = QueryInspector(threshold, slow_ms)
+    try:
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(inspector))
+            yield inspector
+    finally:
+        # A request that failed is as worth reporting as one that did not.
+        inspector.report(label)
+
+
+class QueryInspectionMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with inspect_queries(f"{request.method} {request.path}"):
+            return self.get_response(request)
@@ -0,0 +1,183 @@
+import heapq
+import math
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+
+from events.models import (
+    CategoryAffinity,
+    Event,
+    Recommendation,
+    RecommendationRefresh,
+    WaitlistEntry,
+)
+
+# Candidates kept per user, and categories remembered per user.
+TOP_K = 20
+TOP_CATEGORIES = 5
+
+# Lets popular events outside a user's categories still place, and ranks
+# everything for users with no RSVPs yet.
+BASE_AFFINITY = 0.1
+
+BATCH_SIZE = 1000
+
+# How long a list shorter than the dashboard asks for, possibly empty, is
+# trusted before it is computed again to pick up events add_event() did not
+# offer the user.
+SHORT_LIST_MAX_AGE = timedelta(minutes=15)
+
+Participant = Event.participants.through
+
+
+def _score(affinity, rsvp_count):
+    return (BASE_AFFINITY + affinity) * (1 + math.log1p(rsvp_count))
+
+
+def _affinities(user_id):
+    """Share of the user's RSVPs per category, for their top categories."""
+
+    per_category = Counter(
+        dict(
+            Participant.objects.filter(user_id=user_id)
+            .values("event__category_id")
+            .annotate(n=Count("id"))
+            .values_list("event__category_id", "n")
+        )
+    )
+    total = sum(per_category.values())
+    return {
+        category_id: n / total
+        for category_id, n in per_category.most_common(TOP_CATEGORIES)
+    }
+
+
+def _acted_on(user_id, event_ref):
+    """Whether the user is attending or waiting for the event at ``event_ref``."""
+
+    event_id = OuterRef(event_ref)
+    attending = Participant.objects.filter(user_id=user_id, event_id=event_id)
+    waiting = WaitlistEntry.objects.filter(user_id=user_id, event_id=event_id)
+    return Exists(attending) | Exists(waiting)
+
+
+def refresh_user(user_id, today=None):
+    """
+    Recompute one user's category affinities and top-K candidates. Reads at
+    most TOP_K upcoming events per top category, plus the soonest 2 * TOP_K
+    anywhere, each through a date-ordered index, so the cost does not grow
+    with the catalog.
+    """
+
+    now = timezone.now()
+    today = today or now.date()
+    affinities = _affinities(user_id)
+    upcoming = (
+        Event.objects.filter(~_acted_on(user_id, "pk"), date__gte=today)
+        .order_by("date", "time", "id")
+        .values_list("id", "category_id", "rsvp_count")
+    )
+
+    candidates = list(upcoming[: 2 * TOP_K])
+    for category_id in affinities:
+        candidates += upcoming.filter(category_id=category_id)[:TOP_K]
+
+    scores = {
+        event_id: _score(affinities.get(category_id, 0), rsvp_count)
+        for event_id, category_id, rsvp_count in candidates
+    }
+    top = heapq.nlargest(TOP_K, scores.items(), key=lambda item: item[1])
+
+    with transaction.atomic():
+        CategoryAffinity.objects.filter(user_id=user_id).delete()
+        CategoryAffinity.objects.bulk_create(
+            CategoryAffinity(user_id=user_id, category_id=category_id, score=score)
+            for category_id, score in affinities.items()
+        )
+        Recommendation.objects.filter(user_id=user_id).delete()
+        Recommendation.objects.bulk_create(
+            Recommendation(user_id=user_id, event_id=event_id, score=score)
+            for event_id, score in top
+        )
+        RecommendationRefresh.objects.filter(user_id=user_id).delete()
+        RecommendationRefresh.objects.create(user_id=user_id, refreshed_at=now)
+
+
+def invalidate(user_ids):
+    """
+    Drop the users' lists once their RSVPs change; recommended_events()
+    rebuilds each on its next read. Dropping the affinities too keeps
+    add_event() from restarting a dropped list with a single row.
+    """
+
+    with transaction.atomic():
+        CategoryAffinity.objects.filter(user_id__in=user_ids).delete()
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        RecommendationRefresh.objects.filter(user_id__in=user_ids).delete()
+
+
+def invalidate_after_commit(user_ids):
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: invalidate(user_ids))
+
+
+def add_event(event):
+    """
+    Offer a new upcoming event to every user with an affinity for its
+    category. Lists may run past TOP_K until the user's next refresh; the
+    dashboard only reads the best few.
+    """
+
+    if event.date < timezone.now().date():
+        return
+
+    interested = CategoryAffinity.objects.filter(
+        category_id=event.category_id
+    ).values_list("user_id", "score")
+    batch = []
+    for user_id, affinity in interested.iterator(chunk_size=BATCH_SIZE):
+        score = _score(affinity, event.rsvp_count)
+        batch.append(Recommendation(user_id=user_id, event_id=event.pk, score=score))
+        if len(batch) >= BATCH_SIZE:
+            Recommendation.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    Recommendation.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def recommended_events(user, limit=6):
+    """
+    The user's best upcoming candidates, read from their precomputed list.
+    A user without a list, new or invalidated, gets one computed on the
+    spot, as does one whose list runs short because stored candidates have
+    since passed or been RSVP'd to, or was computed short over
+    SHORT_LIST_MAX_AGE ago.
+    """
+
+    now = timezone.now()
+    today = now.date()
+    rows = (
+        Recommendation.objects.filter(
+            ~_acted_on(user.pk, "event_id"), user=user, event__date__gte=today
+        )
+        .select_related("event__category")
+        .prefetch_related("event__image_variants")
+        .order_by("-score", "event_id")
+    )
+
+    events = [row.event for row in rows[:limit]]
+    if len(events) < limit:
+        # Rebuild only if the list holds rows it can no longer show, or was
+        # never computed or long ago; a short or empty list over a small
+        # catalog is already complete.
+        stored = Recommendation.objects.filter(user=user).count()
+        recent = RecommendationRefresh.objects.filter(
+            user=user, refreshed_at__gte=now - SHORT_LIST_MAX_AGE
+        )
+        if stored > len(events) or not recent.exists():
+            refresh_user(user.pk, today)
+            events = [row.event for row in rows[:limit]]
+    return events
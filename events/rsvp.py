@@ -0,0 +1,226 @@
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from events.fragments import bump_event_versions
+from events.models import Event, WaitlistEntry
+from events.recommendations import invalidate_after_commit
+from events.stats import invalidate_dashboard_stats
+from users.signals import send_rsvp_confirmation_email, send_waitlist_promotion_email
+
+CREATED = "created"
+WAITLISTED = "waitlisted"
+ALREADY_ATTENDING = "already_attending"
+ALREADY_WAITLISTED = "already_waitlisted"
+CANCELLED = "cancelled"
+LEFT_WAITLIST = "left_waitlist"
+NOT_ATTENDING = "not_attending"
+
+Participant = Event.participants.through
+
+
+def _insert_ignore(model, **values):
+    # One statement that is both the existence check and the insert: the
+    # model's unique constraint turns a duplicate into a no-op.
+    fields = [model._meta.get_field(name) for name in values]
+    params = [
+        field.get_db_prep_save(values[field.name], connection) for field in fields
+    ]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(model._meta.db_table)}"
+            f" ({', '.join(quote(field.column) for field in fields)})"
+            f" VALUES ({', '.join(['%s'] * len(fields))})"
+            " ON CONFLICT DO NOTHING",
+            params,
+        )
+        return cursor.rowcount == 1
+
+
+def _has_room():
+    return Q(capacity__isnull=True) | Q(rsvp_count__lt=F("capacity"))
+
+
+def _take_seat(event_id):
+    # The conditional UPDATE locks the event row, so concurrent RSVPs can
+    # never push rsvp_count past capacity. While anyone is waiting, seats
+    # only go through _promote so nobody jumps the queue.
+    waiting = WaitlistEntry.objects.filter(event_id=OuterRef("pk"))
+    return Event.objects.filter(_has_room(), ~Exists(waiting), pk=event_id).update(
+        rsvp_count=F("rsvp_count") + 1, updated_at=timezone.now()
+    )
+
+
+def _lock_event(event_id):
+    # An UPDATE that changes nothing is the portable way to take the row
+    # lock: SQLite ignores SELECT ... FOR UPDATE.
+    Event.objects.filter(pk=event_id).update(rsvp_count=F("rsvp_count"))
+
+
+def _promote(event):
+    """
+    Move the head of ``event``'s waitlist into its free seats and return the
+    promoted user ids. The caller must hold the event row lock.
+    """
+
+    capacity, rsvp_count = Event.objects.values_list("capacity", "rsvp_count").get(
+        pk=event.pk
+    )
+    queue = WaitlistEntry.objects.filter(event_id=event.pk)
+    if capacity is not None:
+        if rsvp_count >= capacity:
+            return []
+        queue = queue[: capacity - rsvp_count]
+
+    heads = list(queue.values_list("id", "user_id"))
+    if not heads:
+        return []
+
+    entry_ids = [entry_id for entry_id, _ in heads]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {Participant._meta.db_table} (event_id, user_id)"
+            f" SELECT event_id, user_id FROM {WaitlistEntry._meta.db_table}"
+            f" WHERE id IN ({', '.join(['%s'] * len(entry_ids))})"
+            " ON CONFLICT DO NOTHING",
+            entry_ids,
+        )
+        seated = cursor.rowcount
+    WaitlistEntry.objects.filter(id__in=entry_ids).delete()
+    Event.objects.filter(pk=event.pk).update(
+        rsvp_count=F("rsvp_count") + seated, updated_at=timezone.now()
+    )
+
+    # Queued in this transaction, so mail only goes out if the promotion sticks.
+    promoted = [user_id for _, user_id in heads]
+    for user in User.objects.filter(pk__in=promoted):
+        send_waitlist_promotion_email(user, event)
+
+    if seated < len(heads):
+        # Someone was added to the attendees directly while still queued.
+        promoted += _promote(event)
+    return promoted
+
+
+def _participants_changed(event_id, user_ids=()):
+    # These writes bypass m2m_changed, so do what its receivers would.
+    bump_event_versions(event_id)
+    invalidate_dashboard_stats()
+    invalidate_after_commit(user_ids)
+
+
+def rsvp(event, user):
+    """
+    Give ``user`` a seat at ``event``, or a place at the back of its
+    waitlist when it is full, and queue the confirmation mail for a seat.
+    Returns CREATED, WAITLISTED, ALREADY_ATTENDING or ALREADY_WAITLISTED.
+    """
+
+    with transaction.atomic():
+        if not _insert_ignore(Participant, event=event.pk, user=user.pk):
+            return ALREADY_ATTENDING
+
+        result = CREATED
+        promoted = []
+        if not _take_seat(event.pk):
+            # Look again under the row lock: a seat freed since the first
+            # try had nobody to promote, and no seat can be freed now until
+            # this user is in the queue for it.
+            _lock_event(event.pk)
+            if not _take_seat(event.pk):
+                Participant.objects.filter(event_id=event.pk, user_id=user.pk).delete()
+                joined = _insert_ignore(
+                    WaitlistEntry,
+                    event=event.pk,
+                    user=user.pk,
+                    joined_at=timezone.now(),
+                )
+                result = WAITLISTED if joined else ALREADY_WAITLISTED
+                if joined:
+                    invalidate_after_commit([user.pk])
+
+                # Seats can be free while people wait, e.g. right after the
+                # capacity was raised, and this user may be next in line.
+                promoted = _promote(event)
+                if user.pk in promoted:
+                    result = CREATED
+                elif not promoted:
+                    return result
+
+        if result == CREATED and user.pk not in promoted:
+            # Queued in this transaction, so the seat and its mail commit or
+            # roll back together. A promoted user has the promotion mail.
+            send_rsvp_confirmation_email(user, event)
+
+    _participants_changed(event.pk, [user.pk, *set(promoted) - {user.pk}])
+    return result
+
+
+def cancel_rsvp(event, user):
+    """
+    Take ``user`` off ``event``'s attendees or its waitlist. A freed seat
+    goes to the head of the waitlist in the same transaction. Returns
+    CANCELLED, LEFT_WAITLIST or NOT_ATTENDING.
+    """
+
+    with transaction.atomic():
+        deleted, _ = Participant.objects.filter(
+            event_id=event.pk, user_id=user.pk
+        ).delete()
+        if not deleted:
+            left, _ = WaitlistEntry.objects.filter(
+                event_id=event.pk, user_id=user.pk
+            ).delete()
+            return LEFT_WAITLIST if left else NOT_ATTENDING
+
+        Event.objects.filter(pk=event.pk).update(
+            rsvp_count=F("rsvp_count") - 1, updated_at=timezone.now()
+        )
+        promoted = _promote(event)
+
+    _participants_changed(event.pk, [user.pk, *promoted])
+    return CANCELLED
+
+
+def promote_waitlist(event_ids=None):
+    """
+    Fill the free seats of every event that has people waiting, e.g. after a
+    bulk cancellation or a capacity increase. Each event is promoted in its
+    own short transaction. Returns the number of users promoted.
+    """
+
+    waiting = WaitlistEntry.objects.filter(event_id=OuterRef("pk"))
+    events = Event.objects.filter(_has_room(), Exists(waiting))
+    if event_ids is not None:
+        events = events.filter(pk__in=event_ids)
+
+    promoted = 0
+    for event in list(events):
+        with transaction.atomic():
+            _lock_event(event.pk)
+            seated = _promote(event)
+        if seated:
+            _participants_changed(event.pk, seated)
+            promoted += len(seated)
+    return promoted
+
+
+def waitlist_position(event, user):
+    """1-based place of ``user`` in ``event``'s waitlist, or None."""
+
+    entry = (
+        WaitlistEntry.objects.filter(event_id=event.pk, user_id=user.pk)
+        .values_list("joined_at", "id")
+        .first()
+    )
+    if entry is None:
+        return None
+
+    joined_at, entry_id = entry
+    ahead = WaitlistEntry.objects.filter(
+        Q(joined_at__lt=joined_at) | Q(joined_at=joined_at, id__lt=entry_id),
+        event_id=event.pk,
+    )
+    return ahead.count() + 1
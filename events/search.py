@@ -0,0 +1,179 @@
+import re
+
+from django.db import connection
+from django.db.models import F, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "events_event_fts"
+
+# bm25() column weights, in table column order: name, description,
+# location, category.
+BM25_WEIGHTS = (10.0, 2.0, 4.0, 5.0)
+
+CREATE_FTS_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    name, description, location, category,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+REBUILD_FTS_SQL = f"""
+INSERT INTO {FTS_TABLE} (rowid, name, description, location, category)
+SELECT e.id, e.name, e.description, e.location, c.name
+FROM events_event e JOIN events_category c ON c.id = e.category_id
+"""
+
+
+# On PostgreSQL each event's weighted tsvector is stored in a column that
+# only exists there (see migration 0012), behind a GIN index. Signals keep
+# it current through the same functions that maintain the FTS5 table.
+PG_VECTOR_COLUMN = "search_vector"
+
+PG_UPDATE_VECTORS_SQL = f"""
+UPDATE events_event e SET {PG_VECTOR_COLUMN} =
+    setweight(to_tsvector(e.name), 'A')
+    || setweight(to_tsvector(c.name), 'B')
+    || setweight(to_tsvector(e.location), 'C')
+    || setweight(to_tsvector(e.description), 'D')
+FROM events_category c
+WHERE c.id = e.category_id
+"""
+
+
+def is_sqlite():
+    return connection.vendor == "sqlite"
+
+
+def _update_vectors(condition="", params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(PG_UPDATE_VECTORS_SQL + condition, list(params))
+        return cursor.rowcount
+
+
+def _terms(query):
+    return re.findall(r"\w+", query.lower())
+
+
+def _fts_match(terms):
+    # Every term must match; the trailing * makes the last word (and the
+    # others) prefix matches so results update as the user types.
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def index_event(event):
+    if not is_sqlite():
+        _update_vectors(" AND e.id = %s", [event.pk])
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [event.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, location, category)"
+            " VALUES (%s, %s, %s, %s, %s)",
+            [
+                event.pk,
+                event.name,
+                event.description,
+                event.location,
+                event.category.name,
+            ],
+        )
+
+
+def index_events(event_ids):
+    """Index freshly bulk-created events, which sent no post_save."""
+
+    event_ids = list(event_ids)
+    if not is_sqlite():
+        _update_vectors(" AND e.id = ANY(%s)", [event_ids])
+        return
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(event_ids), 500):
+            batch = event_ids[start : start + 500]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(REBUILD_FTS_SQL + f" WHERE e.id IN ({placeholders})", batch)
+
+
+def unindex_event(event_id):
+    if not is_sqlite():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [event_id])
+
+
+def reindex_category(category):
+    if not is_sqlite():
+        _update_vectors(" AND c.id = %s", [category.pk])
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {FTS_TABLE} SET category = %s WHERE rowid IN"
+            " (SELECT id FROM events_event WHERE category_id = %s)",
+            [category.name, category.pk],
+        )
+
+
+def rebuild_index():
+    if not is_sqlite():
+        return _update_vectors()
+
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_FTS_SQL)
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(REBUILD_FTS_SQL)
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search_events(queryset, query):
+    """
+    Filter ``queryset`` to events matching ``query`` and annotate each with
+    ``search_rank`` (lower is more relevant), so callers can order by it.
+    """
+
+    terms = _terms(query)
+    if not terms:
+        return queryset.none().annotate(search_rank=Value(0.0))
+
+    if not is_sqlite():
+        return _search_postgres(queryset, terms)
+
+    match = _fts_match(terms)
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+    rank = RawSQL(
+        f"SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE}"
+        f" WHERE {FTS_TABLE} MATCH %s AND rowid = events_event.id",
+        [match],
+    )
+    matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+
+    return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+def _search_postgres(queryset, terms):
+    from django.contrib.postgres.search import (
+        SearchQuery,
+        SearchRank,
+        SearchVectorField,
+    )
+
+    # The stored column, not a vector built per row, so the match can use
+    # the GIN index.
+    vector = RawSQL(
+        f'"events_event"."{PG_VECTOR_COLUMN}"', [], output_field=SearchVectorField()
+    )
+    search_query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms), search_type="raw"
+    )
+
+    # Negated so that, as with bm25(), ascending order is best-first.
+    return (
+        queryset.alias(search_vector=vector)
+        .filter(search_vector=search_query)
+        .annotate(search_rank=-SearchRank(F("search_vector"), search_query))
+    )
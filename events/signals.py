@@ -0,0 +1,151 @@
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from events.fragments import (
+    bump_category_version,
+    bump_event_versions,
+    bump_listing_versions,
+)
+from events.models import Category, Event
+from events.recommendations import add_event, invalidate_after_commit
+from events.rsvp import promote_waitlist
+from events.search import index_event, reindex_category, unindex_event
+from events.stats import invalidate_dashboard_stats
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and not reverse:
+        # The membership changed from the user's side (user.groups.add(...)),
+        # so the rest of this request must not see the memoized names.
+        instance.__dict__.pop("_group_names", None)
+
+
+def _existing_rsvps(instance, reverse, pk_set):
+    through = Event.participants.through
+    if reverse:
+        rows = through.objects.filter(user_id=instance.pk)
+        if pk_set is not None:
+            rows = rows.filter(event_id__in=pk_set)
+        return list(rows.values_list("event_id", flat=True))
+
+    rows = through.objects.filter(event_id=instance.pk)
+    if pk_set is not None:
+        rows = rows.filter(user_id__in=pk_set)
+    return list(rows.values_list("user_id", flat=True))
+
+
+def _adjust_rsvp_count(instance, reverse, ids, delta):
+    if not ids:
+        return
+    if reverse:
+        Event.objects.filter(pk__in=ids).update(
+            rsvp_count=F("rsvp_count") + delta, updated_at=timezone.now()
+        )
+        bump_event_versions(*ids)
+    else:
+        Event.objects.filter(pk=instance.pk).update(
+            rsvp_count=F("rsvp_count") + delta * len(ids), updated_at=timezone.now()
+        )
+        bump_event_versions(instance.pk)
+
+
+@receiver(m2m_changed, sender=Event.participants.through)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() only reports the rows it actually inserts, but remove() and
+    # clear() report what was asked for, so the rows that really exist are
+    # looked up before they are deleted.
+    if action == "post_add":
+        _adjust_rsvp_count(instance, reverse, pk_set, 1)
+        if pk_set:
+            invalidate_after_commit([instance.pk] if reverse else pk_set)
+    elif action in ("pre_remove", "pre_clear"):
+        instance._removed_rsvps = _existing_rsvps(
+            instance, reverse, pk_set if action == "pre_remove" else None
+        )
+    elif action in ("post_remove", "post_clear"):
+        removed = instance.__dict__.pop("_removed_rsvps", [])
+        _adjust_rsvp_count(instance, reverse, removed, -1)
+        if removed:
+            _promote_after_commit(removed if reverse else [instance.pk])
+            invalidate_after_commit([instance.pk] if reverse else removed)
+
+
+def _promote_after_commit(event_ids):
+    # Bulk removals hand their freed seats to the waitlist in one pass.
+    if event_ids:
+        transaction.on_commit(lambda: promote_waitlist(event_ids))
+
+
+@receiver(pre_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # Deleting a user cascades through the participants table without
+    # sending m2m_changed.
+    event_ids = _existing_rsvps(instance, True, None)
+    _adjust_rsvp_count(instance, True, event_ids, -1)
+    _promote_after_commit(event_ids)
+
+
+@receiver(pre_save, sender=Event)
+def event_saving(sender, instance, raw=False, **kwargs):
+    # Remember the category the event is leaving, if any, so the listings
+    # of both categories are refreshed.
+    if instance.pk and not raw:
+        instance._previous_category_id = (
+            Event.objects.filter(pk=instance.pk)
+            .values_list("category_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, created, raw=False, **kwargs):
+    bump_event_versions(instance.pk)
+    previous = instance.__dict__.pop("_previous_category_id", None)
+    bump_listing_versions(*{instance.category_id, previous} - {None})
+    if not raw:
+        index_event(instance)
+    if created and not raw:
+        transaction.on_commit(lambda: add_event(instance))
+    if not created and not raw:
+        # The capacity may have been raised.
+        _promote_after_commit([instance.pk])
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    bump_event_versions(instance.pk)
+    bump_listing_versions(instance.category_id)
+    unindex_event(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, raw=False, **kwargs):
+    bump_category_version(instance.pk)
+    if not created and not raw:
+        reindex_category(instance)
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    bump_category_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Event)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Group)
+@receiver(m2m_changed, sender=Event.participants.through)
+@receiver(m2m_changed, sender=User.groups.through)
+def dashboard_data_changed(sender, **kwargs):
+    invalidate_dashboard_stats()
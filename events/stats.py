@@ -0,0 +1,92 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from events.models import Category
+
+STATS_CACHE_KEY = "dashboard_stats"
+STATS_CACHE_TIMEOUT = 60
+
+
+def event_aggregates(today, prefix=""):
+    """
+    Conditional aggregates for the headline event numbers of a dashboard.
+
+    ``prefix`` is the path from the aggregated model to Event, e.g.
+    ``"events__"`` when aggregating over Category.
+    """
+
+    month_start = today.replace(day=1)
+    next_month = (month_start + datetime.timedelta(days=32)).replace(day=1)
+    event_id = f"{prefix}id"
+    date = f"{prefix}date"
+
+    return {
+        "total_events": Count(event_id),
+        "today_count": Count(event_id, filter=Q(**{date: today})),
+        "upcoming_count": Count(event_id, filter=Q(**{f"{date}__gte": today})),
+        "past_count": Count(event_id, filter=Q(**{f"{date}__lt": today})),
+        "monthly_events": Count(
+            event_id,
+            filter=Q(**{f"{date}__gte": month_start, f"{date}__lt": next_month}),
+        ),
+        "total_rsvps": Coalesce(Sum(f"{prefix}rsvp_count"), 0),
+    }
+
+
+def category_summaries(today):
+    """
+    Every category with its event_aggregates and the date of its next
+    upcoming event, grouped in SQL instead of loading the events.
+    """
+
+    return Category.objects.annotate(
+        **event_aggregates(today, prefix="events__"),
+        next_event_date=Min("events__date", filter=Q(events__date__gte=today)),
+    ).order_by("name")
+
+
+def user_statistics():
+    def members(group):
+        return Count("id", distinct=True, filter=Q(groups__name=group))
+
+    return User.objects.aggregate(
+        total_users=Count("id", distinct=True),
+        admin_count=members("Admin"),
+        organizer_count=members("Organizer"),
+        participants_count=members("Participant"),
+    )
+
+
+def compute_dashboard_stats(today):
+    # Categories LEFT JOIN events: one query for both catalogs.
+    stats = Category.objects.aggregate(
+        total_categories=Count("id", distinct=True),
+        **event_aggregates(today, prefix="events__"),
+    )
+    stats.update(user_statistics())
+    return stats
+
+
+def get_dashboard_stats():
+    """
+    Site-wide dashboard numbers, cached for STATS_CACHE_TIMEOUT seconds and
+    dropped by signals whenever events, categories, users or groups change.
+    """
+
+    today = timezone.now().date()
+    cached = cache.get(STATS_CACHE_KEY)
+    if cached is not None and cached[0] == today:
+        return cached[1]
+
+    stats = compute_dashboard_stats(today)
+    cache.set(STATS_CACHE_KEY, (today, stats), STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    cache.delete(STATS_CACHE_KEY)
@@ -0,0 +1,197 @@
+import datetime
+import itertools
+import random
+import statistics
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from faker import Faker
+
+from events.fragments import bump_all_versions
+from events.models import Category, Event
+from events.search import index_events
+from events.stats import invalidate_dashboard_stats
+
+BATCH_SIZE = 2000
+
+# One organizer per this many users unless a count is given.
+USERS_PER_ORGANIZER = 20
+
+Participant = Event.participants.through
+Membership = User.groups.through
+
+
+class DatasetExists(ValueError):
+    """The usernames a dataset would use are already taken."""
+
+
+def popularity_weights(n, alpha):
+    """Zipf weights: the event ranked k draws 1 / k**alpha of the RSVPs."""
+    return [1 / rank**alpha for rank in range(1, n + 1)]
+
+
+def _rsvp_count(rng, mean, limit):
+    # Exponential, so most users RSVP a little and a few RSVP a lot.
+    if mean <= 0:
+        return 0
+    return min(limit, round(rng.expovariate(1 / mean)))
+
+
+def generate(
+    users=1000,
+    events=200,
+    categories=10,
+    organizers=None,
+    rsvps_per_user=5.0,
+    alpha=1.1,
+    seed=42,
+    prefix="synthetic",
+    password="password123",
+    role_usernames=False,
+):
+    """
+    Bulk-create a synthetic catalog: ``users`` accounts (the first
+    ``organizers`` of them organizers, the rest participants), ``events``
+    events across ``categories`` categories, and RSVPs whose spread over
+    events follows a power law with exponent ``alpha``, so a few hot events
+    draw most of the attendance. The same seed gives the same data.
+
+    Every account shares one precomputed hash of ``password``. Usernames
+    are ``prefix``_0, ``prefix``_1, ..., or with ``role_usernames`` the
+    sample data's organizer_1, ... and participant_1, ...; DatasetExists is
+    raised if such users already exist.
+    """
+
+    if events and not categories:
+        raise ValueError("Events need at least one category.")
+
+    organizers = min(users, organizers or max(1, users // USERS_PER_ORGANIZER))
+    if role_usernames:
+        usernames = [f"organizer_{i + 1}" for i in range(organizers)] + [
+            f"participant_{i + 1}" for i in range(users - organizers)
+        ]
+        taken = Q(username__startswith="organizer_")
+        taken |= Q(username__startswith="participant_")
+        if User.objects.filter(taken).exists():
+            raise DatasetExists("Organizer and participant accounts already exist.")
+    else:
+        usernames = [f"{prefix}_{i}" for i in range(users)]
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise DatasetExists(
+                f"Users prefixed {prefix!r} already exist; pick another."
+            )
+
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    today = timezone.now().date()
+    password_hash = make_password(password)
+
+    groups = {
+        name: Group.objects.get_or_create(name=name)[0]
+        for name in ("Admin", "Organizer", "Participant")
+    }
+
+    with transaction.atomic():
+        category_rows = Category.objects.bulk_create(
+            Category(
+                name=f"{prefix} {i} {fake.word().capitalize()}"[:50],
+                description=fake.sentence(),
+            )
+            for i in range(categories)
+        )
+
+        user_rows = User.objects.bulk_create(
+            (
+                User(
+                    username=username,
+                    email=f"{username}@example.com",
+                    first_name=fake.first_name(),
+                    last_name=fake.last_name(),
+                    password=password_hash,
+                )
+                for username in usernames
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        organizer_rows = user_rows[:organizers]
+        participant_rows = user_rows[organizers:]
+        Membership.objects.bulk_create(
+            [
+                Membership(user_id=user.pk, group_id=groups["Organizer"].pk)
+                for user in organizer_rows
+            ]
+            + [
+                Membership(user_id=user.pk, group_id=groups["Participant"].pk)
+                for user in participant_rows
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        event_rows = Event.objects.bulk_create(
+            (
+                Event(
+                    name=fake.catch_phrase()[:100],
+                    description=fake.paragraph(),
+                    date=today + datetime.timedelta(days=rng.randint(-180, 180)),
+                    time=datetime.time(
+                        rng.randint(8, 21), rng.choice((0, 15, 30, 45))
+                    ),
+                    location=fake.city(),
+                    category=rng.choice(category_rows),
+                    created_by=rng.choice(organizer_rows) if organizer_rows else None,
+                )
+                for _ in range(events)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        # Popularity rank is independent of id and date.
+        ranked = [event.pk for event in event_rows]
+        rng.shuffle(ranked)
+        weights = popularity_weights(len(ranked), alpha)
+        cum_weights = list(itertools.accumulate(weights))
+        # Without events there is nothing to RSVP to.
+        limit = min(len(ranked), max(1, len(ranked) // 2))
+
+        attendance = Counter()
+        batch = []
+        for user in participant_rows:
+            count = _rsvp_count(rng, rsvps_per_user, limit)
+            picked = set()
+            while len(picked) < count:
+                draws = count - len(picked)
+                picked.update(rng.choices(ranked, cum_weights=cum_weights, k=draws))
+            attendance.update(picked)
+            batch.extend(Participant(event_id=pk, user_id=user.pk) for pk in picked)
+            if len(batch) >= BATCH_SIZE:
+                Participant.objects.bulk_create(batch)
+                batch = []
+        Participant.objects.bulk_create(batch)
+
+        if event_rows:
+            new_events = Event.objects.filter(
+                pk__gte=event_rows[0].pk, pk__lte=event_rows[-1].pk
+            )
+            new_events.sync_rsvp_counts()
+            index_events(ranked)
+
+    # bulk_create sends no signals.
+    bump_all_versions()
+    invalidate_dashboard_stats()
+
+    per_event = [attendance[pk] for pk in ranked]
+    return {
+        "categories": len(category_rows),
+        "organizers": len(organizer_rows),
+        "participants": len(participant_rows),
+        "events": len(event_rows),
+        "rsvps": sum(per_event),
+        "hottest_event_rsvps": max(per_event, default=0),
+        "median_event_rsvps": statistics.median(per_event) if per_event else 0,
+        "events_by_popularity": ranked,
+    }
@@ -0,0 +1,207 @@
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from events.fragments import bump_event_versions
+from events.models import Event, EventImageVariant, ImageJob
+from events.utils import optimize_image_for_web
+
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=10)
+
+
+def _claimable_jobs(now):
+    # Jobs left in "processing" by a worker that died are picked up again
+    # once their lock is older than STALE_AFTER.
+    return ImageJob.objects.filter(
+        Q(status=ImageJob.Status.PENDING)
+        | Q(status=ImageJob.Status.PROCESSING, locked_at__lt=now - STALE_AFTER)
+    )
+
+
+def claim_next_job():
+    now = timezone.now()
+    candidates = _claimable_jobs(now).order_by("created_at").values_list(
+        "id", flat=True
+    )[:10]
+
+    for job_id in candidates:
+        # The conditional UPDATE is the lock: only one worker can move a
+        # given row out of the claimable state.
+        claimed = (
+            _claimable_jobs(now)
+            .filter(id=job_id)
+            .update(
+                status=ImageJob.Status.PROCESSING,
+                locked_at=now,
+                attempts=F("attempts") + 1,
+            )
+        )
+        if claimed:
+            return ImageJob.objects.select_related("event").get(id=job_id)
+
+    return None
+
+
+def _finish(job, status, error=""):
+    ImageJob.objects.filter(id=job.id).update(
+        status=status, error=error, finished_at=timezone.now()
+    )
+
+
+def _fail(job, error):
+    _finish(job, ImageJob.Status.FAILED, error)
+    # Only if the event still shows this upload, so the card leaves its
+    # pending state instead of waiting for a job that will never finish.
+    Event.objects.filter(pk=job.event_id, image=job.image_name).update(
+        image_status=Event.ImageStatus.FAILED, updated_at=timezone.now()
+    )
+
+
+def process_job(job):
+    event = job.event
+
+    if event.image.name != job.image_name:
+        # A newer upload replaced this image; its own job will handle it.
+        _finish(job, ImageJob.Status.DONE, "superseded")
+        return False
+
+    result = optimize_image_for_web(event.image)
+
+    if result is None:
+        if job.attempts >= MAX_ATTEMPTS:
+            _fail(job, "optimization failed")
+        else:
+            ImageJob.objects.filter(id=job.id).update(
+                status=ImageJob.Status.PENDING, locked_at=None
+            )
+        return False
+
+    new_name, variants = result
+    storage = event.image.storage
+    stale_files = []
+
+    with transaction.atomic():
+        # Swap only if the event still points at the file we optimized, so a
+        # concurrent re-upload is never overwritten with a stale image.
+        swapped = Event.objects.filter(pk=event.pk, image=job.image_name).update(
+            image=new_name,
+            image_status=Event.ImageStatus.READY,
+            updated_at=timezone.now(),
+        )
+
+        # Names are content hashes, so a re-encode that produced the same
+        # bytes reuses a file the old variants already point at.
+        new_names = {new_name} | {variant["name"] for variant in variants}
+
+        if swapped:
+            old_variants = EventImageVariant.objects.filter(event=event)
+            stale_files = [
+                name
+                for name in old_variants.values_list("file", flat=True)
+                if name not in new_names
+            ]
+            old_variants.delete()
+            EventImageVariant.objects.bulk_create(
+                EventImageVariant(
+                    event=event,
+                    format=variant["format"],
+                    width=variant["width"],
+                    height=variant["height"],
+                    file=variant["name"],
+                )
+                for variant in variants
+            )
+            if new_name != job.image_name:
+                stale_files.append(job.image_name)
+        else:
+            in_use = set(
+                EventImageVariant.objects.filter(file__in=new_names).values_list(
+                    "file", flat=True
+                )
+            )
+            stale_files = list(new_names - in_use)
+
+    if swapped:
+        bump_event_versions(event.pk)
+
+    for name in stale_files:
+        storage.delete(name)
+
+    _finish(job, ImageJob.Status.DONE, "" if swapped else "superseded")
+    return bool(swapped)
+
+
+def enqueue_missing_variants():
+    events = (
+        Event.objects.exclude(image="")
+        .exclude(image="default.webp")
+        .filter(image_variants__isnull=True)
+        # Already queued or being worked on.
+        .exclude(
+            image_jobs__status__in=[
+                ImageJob.Status.PENDING,
+                ImageJob.Status.PROCESSING,
+            ]
+        )
+    )
+    jobs = [ImageJob(event=event, image_name=event.image.name) for event in events]
+    ImageJob.objects.bulk_create(jobs)
+    return len(jobs)
+
+
+def work(stop_event=None, poll_interval=2.0, once=False):
+    """Process jobs until stopped, or until the queue is empty when once=True."""
+
+    stop_event = stop_event or threading.Event()
+    processed = 0
+
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            job = claim_next_job()
+
+            if job is None:
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            try:
+                process_job(job)
+            except Exception as e:
+                _fail(job, str(e))
+            processed += 1
+    finally:
+        connection.close()
+
+    return processed
+
+
+def run_workers(workers=2, poll_interval=2.0, once=False, stop_event=None):
+    stop_event = stop_event or threading.Event()
+    results = []
+
+    def target():
+        results.append(work(stop_event, poll_interval, once))
+
+    threads = [
+        threading.Thread(target=target, name=f"image-worker-{i + 1}", daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+
+    return sum(results)
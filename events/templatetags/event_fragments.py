@@ -0,0 +1,49 @@
+from django import template
+
+from events.fragments import fragment_key, get_fragment, set_fragment
+
+register = template.Library()
+
+
+class EventFragmentNode(template.Node):
+    def __init__(self, name, event, nodelist):
+        self.name = name
+        self.event = event
+        self.nodelist = nodelist
+
+    def render(self, context):
+        event = self.event.resolve(context)
+        key = fragment_key(self.name, event)
+
+        html = get_fragment(key)
+        if html is None:
+            html = self.nodelist.render(context)
+            set_fragment(key, html)
+
+        return html
+
+
+@register.tag
+def eventfragment(parser, token):
+    """
+    Cache the enclosed markup for one event, shared by every viewer:
+
+        {% eventfragment "card" event %}...{% endeventfragment %}
+
+    The key carries the event's updated_at and the event's and its
+    category's version stamps, which signals bump whenever either changes,
+    so entries never go stale. The enclosed block must not depend on the
+    current user or request, and should be whole elements.
+    """
+
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' expects a fragment name and an event"
+        )
+
+    nodelist = parser.parse(("endeventfragment",))
+    parser.delete_first_token()
+
+    name = bits[1].strip("\"'")
+    return EventFragmentNode(name, parser.compile_filter(bits[2]), nodelist)
@@ -0,0 +1,51 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+CARD_SIZES = "(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+
+
+@register.simple_tag
+def responsive_image(event, sizes=CARD_SIZES, **attrs):
+    """
+    Render an event image as a <picture> with AVIF/WebP srcset candidates.
+
+    Falls back to a plain <img> while the variants are still being generated.
+    Extra keyword arguments become attributes of the <img> element.
+    """
+
+    attrs.setdefault("alt", event.name)
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    img = format_html("<img src=\"{}\"{}>", event.image.url, flatatt(attrs))
+
+    if not event.image_ready:
+        return img
+
+    srcsets = {}
+    for variant in event.image_variants.all():
+        srcsets.setdefault(variant.format, []).append(
+            (variant.file.url, variant.width)
+        )
+
+    if not srcsets:
+        return img
+
+    sources = format_html_join(
+        "",
+        "<source type=\"image/{}\" srcset=\"{}\" sizes=\"{}\">",
+        (
+            (
+                image_format,
+                ", ".join(f"{url} {width}w" for url, width in candidates),
+                sizes,
+            )
+            for image_format, candidates in sorted(srcsets.items())
+        ),
+    )
+
+    return format_html(
+        "<picture style=\"display: contents\">{}{}</picture>", sources, img
+    )
@@ -0,0 +1,23 @@
+from django import template
+
+register = template.Library()
+
+
+def _event_id(event):
+    return getattr(event, "pk", event)
+
+
+@register.filter
+def has_rsvp(viewer, event):
+    """``{% if viewer|has_rsvp:event %}``; ``event`` may also be an id."""
+    return _event_id(event) in viewer.rsvp_event_ids
+
+
+@register.filter
+def on_waitlist(viewer, event):
+    return _event_id(event) in viewer.waitlist_event_ids
+
+
+@register.filter
+def in_group(viewer, name):
+    return name in viewer.groups
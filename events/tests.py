@@ -1,3 +1,1001 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import re
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from events import rsvp
+from events.fragments import (
+    FRAGMENT_CACHE,
+    bump_all_versions,
+    fragment_key,
+    fragment_stats,
+)
+from events.pagination import (
+    DATE_ORDERING,
+    _decode_cursor,
+    _encode_cursor,
+    paginate_events,
+)
+from events.recommendations import (
+    SHORT_LIST_MAX_AGE,
+    recommended_events,
+    refresh_user,
+)
+from events.pagecache import (
+    PAGE_CACHE,
+    _normalized_params,
+    _page_key,
+    page_cache_stats,
+)
+from events.querylog import fingerprint, inspect_queries
+from events.search import search_events
+from events.synthetic import DatasetExists, generate
+from events.transfer import import_events, iter_csv, iter_jsonl
+from events.models import (
+    Category,
+    CategoryAffinity,
+    Event,
+    Recommendation,
+    RecommendationRefresh,
+    WaitlistEntry,
+)
+from users.models import OutboxMessage
+
+
+def make_event(category, name="Concert", **fields):
+    fields.setdefault("description", "Live music")
+    fields.setdefault("date", datetime.date.today() + datetime.timedelta(days=7))
+    fields.setdefault("time", datetime.time(18, 0))
+    fields.setdefault("location", "Dhaka")
+    return Event.objects.create(name=name, category=category, **fields)
+
+
+def make_users(count, prefix="user"):
+    return [
+        User.objects.create_user(
+            f"{prefix}{i}", email=f"{prefix}{i}@example.com", password="x"
+        )
+        for i in range(count)
+    ]
+
+
+class RsvpServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Music")
+        cls.users = make_users(4)
+
+    def make_event(self, capacity=None):
+        return make_event(self.category, capacity=capacity)
+
+    def attendees(self, event):
+        return set(event.participants.values_list("username", flat=True))
+
+    def waitlist(self, event):
+        return list(
+            WaitlistEntry.objects.filter(event=event).values_list(
+                "user__username", flat=True
+            )
+        )
+
+    def assertCountInSync(self, event):
+        event = Event.objects.with_actual_rsvp_count().get(pk=event.pk)
+        self.assertEqual(event.rsvp_count, event.actual_rsvp_count)
+
+    def test_rsvp_takes_a_seat(self):
+        event = self.make_event()
+
+        self.assertEqual(rsvp.rsvp(event, self.users[0]), rsvp.CREATED)
+        self.assertEqual(self.attendees(event), {"user0"})
+        self.assertCountInSync(event)
+
+    def test_rsvp_twice_is_idempotent(self):
+        event = self.make_event()
+        rsvp.rsvp(event, self.users[0])
+
+        self.assertEqual(rsvp.rsvp(event, self.users[0]), rsvp.ALREADY_ATTENDING)
+        self.assertEqual(Event.objects.get(pk=event.pk).rsvp_count, 1)
+        self.assertCountInSync(event)
+
+    def test_confirmation_is_queued_once_per_seat(self):
+        event = self.make_event()
+        OutboxMessage.objects.all().delete()
+
+        rsvp.rsvp(event, self.users[0])
+        rsvp.rsvp(event, self.users[0])
+
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_full_event_puts_users_on_the_waitlist(self):
+        event = self.make_event(capacity=1)
+        rsvp.rsvp(event, self.users[0])
+
+        self.assertEqual(rsvp.rsvp(event, self.users[1]), rsvp.WAITLISTED)
+        self.assertEqual(rsvp.rsvp(event, self.users[1]), rsvp.ALREADY_WAITLISTED)
+        self.assertEqual(self.attendees(event), {"user0"})
+        self.assertEqual(self.waitlist(event), ["user1"])
+        self.assertEqual(Event.objects.get(pk=event.pk).rsvp_count, 1)
+        self.assertCountInSync(event)
+
+    def test_waitlist_keeps_arrival_order(self):
+        event = self.make_event(capacity=1)
+        for user in self.users:
+            rsvp.rsvp(event, user)
+
+        self.assertEqual(self.waitlist(event), ["user1", "user2", "user3"])
+        self.assertEqual(rsvp.waitlist_position(event, self.users[1]), 1)
+        self.assertEqual(rsvp.waitlist_position(event, self.users[3]), 3)
+        self.assertIsNone(rsvp.waitlist_position(event, self.users[0]))
+
+    def test_cancel_promotes_the_head_of_the_waitlist(self):
+        event = self.make_event(capacity=1)
+        for user in self.users[:3]:
+            rsvp.rsvp(event, user)
+
+        self.assertEqual(rsvp.cancel_rsvp(event, self.users[0]), rsvp.CANCELLED)
+        self.assertEqual(self.attendees(event), {"user1"})
+        self.assertEqual(self.waitlist(event), ["user2"])
+        self.assertEqual(rsvp.waitlist_position(event, self.users[2]), 1)
+        self.assertCountInSync(event)
+
+    def test_cancel_is_idempotent(self):
+        event = self.make_event()
+        rsvp.rsvp(event, self.users[0])
+
+        self.assertEqual(rsvp.cancel_rsvp(event, self.users[0]), rsvp.CANCELLED)
+        self.assertEqual(rsvp.cancel_rsvp(event, self.users[0]), rsvp.NOT_ATTENDING)
+        self.assertEqual(Event.objects.get(pk=event.pk).rsvp_count, 0)
+        self.assertCountInSync(event)
+
+    def test_leaving_the_waitlist_keeps_the_seats(self):
+        event = self.make_event(capacity=1)
+        rsvp.rsvp(event, self.users[0])
+        rsvp.rsvp(event, self.users[1])
+
+        self.assertEqual(rsvp.cancel_rsvp(event, self.users[1]), rsvp.LEFT_WAITLIST)
+        self.assertEqual(self.attendees(event), {"user0"})
+        self.assertEqual(self.waitlist(event), [])
+        self.assertCountInSync(event)
+
+    def test_promote_waitlist_fills_raised_capacity_in_order(self):
+        event = self.make_event(capacity=1)
+        for user in self.users:
+            rsvp.rsvp(event, user)
+
+        # A queryset update sends no signals, as with a bulk change.
+        Event.objects.filter(pk=event.pk).update(capacity=3)
+
+        self.assertEqual(rsvp.promote_waitlist([event.pk]), 2)
+        self.assertEqual(self.attendees(event), {"user0", "user1", "user2"})
+        self.assertEqual(self.waitlist(event), ["user3"])
+        self.assertEqual(rsvp.promote_waitlist([event.pk]), 0)
+        self.assertCountInSync(event)
+
+    def test_joining_a_queue_with_free_seats_promotes_in_order(self):
+        event = self.make_event(capacity=1)
+        for user in self.users[:3]:
+            rsvp.rsvp(event, user)
+        Event.objects.filter(pk=event.pk).update(capacity=4)
+        OutboxMessage.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = rsvp.rsvp(event, self.users[3])
+
+        self.assertEqual(result, rsvp.CREATED)
+        self.assertEqual(self.attendees(event), {f"user{i}" for i in range(4)})
+        self.assertEqual(self.waitlist(event), [])
+        self.assertCountInSync(event)
+        # The joining user was promoted too, so gets only the promotion mail.
+        recipients = OutboxMessage.objects.values_list("recipients", flat=True)
+        self.assertEqual(
+            sorted(r[0] for r in recipients),
+            [f"user{i}@example.com" for i in (1, 2, 3)],
+        )
+
+    def test_promotions_invalidate_the_promoted_users_lists(self):
+        event = self.make_event(capacity=1)
+        for user in self.users[:3]:
+            rsvp.rsvp(event, user)
+        Event.objects.filter(pk=event.pk).update(capacity=2)
+        for user in self.users:
+            RecommendationRefresh.objects.create(user=user, refreshed_at=timezone.now())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = rsvp.rsvp(event, self.users[3])
+
+        self.assertEqual(result, rsvp.WAITLISTED)
+        self.assertEqual(self.waitlist(event), ["user2", "user3"])
+        refreshed = RecommendationRefresh.objects.values_list(
+            "user__username", flat=True
+        )
+        self.assertEqual(sorted(refreshed), ["user0", "user2"])
+
+    def test_capacity_is_never_exceeded(self):
+        event = self.make_event(capacity=2)
+        results = [rsvp.rsvp(event, user) for user in self.users]
+
+        self.assertEqual(results.count(rsvp.CREATED), 2)
+        self.assertEqual(results.count(rsvp.WAITLISTED), 2)
+        self.assertEqual(Event.objects.get(pk=event.pk).rsvp_count, 2)
+        self.assertCountInSync(event)
+
+
+class RsvpCountSignalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Music")
+        cls.users = make_users(3)
+
+    def setUp(self):
+        self.events = [make_event(self.category, name=f"Event {i}") for i in range(2)]
+
+    def counts(self):
+        return [Event.objects.get(pk=event.pk).rsvp_count for event in self.events]
+
+    def test_add_from_the_event_side(self):
+        event = self.events[0]
+        event.participants.add(*self.users)
+        # Rows that already exist are not inserted, so not counted, again.
+        event.participants.add(self.users[0])
+
+        self.assertEqual(self.counts(), [3, 0])
+
+    def test_add_from_the_user_side(self):
+        self.users[0].rsvp_events.add(*self.events)
+
+        self.assertEqual(self.counts(), [1, 1])
+
+    def test_remove_counts_only_existing_rows(self):
+        event = self.events[0]
+        event.participants.add(self.users[0], self.users[1])
+
+        event.participants.remove(self.users[0], self.users[2])
+
+        self.assertEqual(self.counts(), [1, 0])
+
+    def test_remove_and_clear_from_the_user_side(self):
+        user = self.users[0]
+        user.rsvp_events.add(*self.events)
+        self.events[1].participants.add(self.users[1])
+
+        user.rsvp_events.remove(self.events[0])
+        self.assertEqual(self.counts(), [0, 2])
+
+        user.rsvp_events.clear()
+        self.assertEqual(self.counts(), [0, 1])
+
+    def test_clear_from_the_event_side(self):
+        self.events[0].participants.add(*self.users)
+
+        self.events[0].participants.clear()
+
+        self.assertEqual(self.counts(), [0, 0])
+
+    def test_deleting_a_user_releases_their_seats(self):
+        for event in self.events:
+            event.participants.add(self.users[0], self.users[1])
+
+        self.users[0].delete()
+
+        self.assertEqual(self.counts(), [1, 1])
+
+    def test_sync_repairs_drifted_counts(self):
+        self.events[0].participants.add(*self.users)
+        Event.objects.update(rsvp_count=7)
+
+        Event.objects.sync_rsvp_counts()
+
+        self.assertEqual(self.counts(), [3, 0])
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Music")
+        today = datetime.date.today()
+        # Several events share a date and time, so the id breaks ties.
+        cls.events = [
+            make_event(
+                category,
+                name=f"Event {i}",
+                date=today + datetime.timedelta(days=i // 3),
+                time=datetime.time(18 if i % 3 else 9, 0),
+            )
+            for i in range(7)
+        ]
+        cls.ordered = list(Event.objects.order_by(*DATE_ORDERING))
+
+    def page(self, cursor="", per_page=3, **params):
+        if cursor:
+            params["cursor"] = cursor
+        request = RequestFactory().get("/", params)
+        return paginate_events(request, Event.objects.all(), per_page=per_page)
+
+    def test_cursor_round_trip(self):
+        event = self.ordered[0]
+        token = _encode_cursor("after", event, DATE_ORDERING)
+
+        self.assertNotIn("=", token)
+        self.assertEqual(
+            _decode_cursor(token, DATE_ORDERING),
+            ("after", [event.date, event.time, event.pk]),
+        )
+
+    def test_malformed_cursors_are_ignored(self):
+        event = self.ordered[0]
+        wrong_length = _encode_cursor("after", event, ("date", "id"))
+        wrong_direction = _encode_cursor("sideways", event, DATE_ORDERING)
+
+        for token in ("", "not base64!", "bm90IGpzb24", wrong_length, wrong_direction):
+            with self.subTest(token=token):
+                self.assertIsNone(_decode_cursor(token, DATE_ORDERING))
+
+    def test_malformed_cursor_shows_the_first_page(self):
+        page = self.page("garbage")
+
+        self.assertEqual(page.object_list, self.ordered[:3])
+        self.assertFalse(page.has_previous)
+
+    def test_walks_forward_and_back_without_gaps(self):
+        pages = [self.page()]
+        while pages[-1].has_next:
+            pages.append(self.page(pages[-1].next_cursor))
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([e for page in pages for e in page], self.ordered)
+        self.assertFalse(pages[0].has_previous)
+        self.assertIsNone(pages[-1].next_cursor)
+
+        back = self.page(pages[-1].previous_cursor)
+        self.assertEqual(back.object_list, pages[1].object_list)
+        self.assertTrue(back.has_next)
+        first = self.page(back.previous_cursor)
+        self.assertEqual(first.object_list, pages[0].object_list)
+        self.assertFalse(first.has_previous)
+
+    def test_exact_final_page_has_no_next(self):
+        page = self.page(per_page=7)
+
+        self.assertEqual(len(page), 7)
+        self.assertFalse(page.has_next)
+
+    def test_links_keep_other_parameters(self):
+        page = self.page(q="music")
+
+        self.assertIn("q=music", page.next_query)
+        self.assertIn("cursor=", page.next_query)
+
+    def test_empty_queryset(self):
+        request = RequestFactory().get("/")
+        page = paginate_events(request, Event.objects.none())
+
+        self.assertEqual(len(page), 0)
+        self.assertFalse(page.has_next or page.has_previous)
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "FTS5 ranking is SQLite's")
+class Fts5SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.music = Category.objects.create(name="Music")
+        cls.sports = Category.objects.create(name="Sports")
+        cls.in_name = make_event(cls.music, name="Jazz night")
+        cls.in_description = make_event(
+            cls.music, name="Evening out", description="Smooth jazz and dinner"
+        )
+        cls.unrelated = make_event(cls.sports, name="Football final")
+
+    def search(self, query):
+        results = search_events(Event.objects.all(), query)
+        return list(results.order_by("search_rank", "id"))
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search("jazz"), [self.in_name, self.in_description])
+
+    def test_last_word_matches_as_a_prefix(self):
+        self.assertEqual(self.search("footb"), [self.unrelated])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search("jazz dinner"), [self.in_description])
+        self.assertEqual(self.search("jazz football"), [])
+
+    def test_diacritics_and_case_are_ignored(self):
+        self.assertEqual(self.search("JÁZZ NIGHT"), [self.in_name])
+
+    def test_category_names_are_searchable_and_follow_renames(self):
+        self.assertEqual(self.search("sports"), [self.unrelated])
+
+        self.sports.name = "Athletics"
+        self.sports.save()
+
+        self.assertEqual(self.search("sports"), [])
+        self.assertEqual(self.search("athletics"), [self.unrelated])
+
+    def test_edits_and_deletions_reach_the_index(self):
+        self.unrelated.name = "Cricket final"
+        self.unrelated.save()
+        self.assertEqual(self.search("football"), [])
+        self.assertEqual(self.search("cricket"), [self.unrelated])
+
+        self.unrelated.delete()
+        self.assertEqual(self.search("cricket"), [])
+
+    def test_query_without_words_matches_nothing(self):
+        self.assertEqual(self.search("  -- "), [])
+
+
+class FragmentKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.music = Category.objects.create(name="Music")
+        cls.sports = Category.objects.create(name="Sports")
+
+    def setUp(self):
+        caches[FRAGMENT_CACHE].clear()
+        self.event = make_event(self.music)
+        self.other = make_event(self.sports, name="Match")
+
+    def key(self, event):
+        return fragment_key("card", Event.objects.get(pk=event.pk))
+
+    def test_key_is_stable_and_per_event(self):
+        self.assertEqual(self.key(self.event), self.key(self.event))
+        self.assertNotEqual(self.key(self.event), self.key(self.other))
+        self.assertNotEqual(
+            fragment_key("card", self.event), fragment_key("table_row", self.event)
+        )
+
+    def test_saving_the_event_changes_only_its_key(self):
+        before, other = self.key(self.event), self.key(self.other)
+
+        self.event.name = "Gig"
+        self.event.save()
+
+        self.assertNotEqual(self.key(self.event), before)
+        self.assertEqual(self.key(self.other), other)
+
+    def test_rsvps_change_the_key(self):
+        before = self.key(self.event)
+
+        rsvp.rsvp(self.event, User.objects.create_user("fan"))
+
+        self.assertNotEqual(self.key(self.event), before)
+
+    def test_renaming_the_category_changes_its_events_keys(self):
+        before, other = self.key(self.event), self.key(self.other)
+
+        self.music.name = "Concerts"
+        self.music.save()
+
+        self.assertNotEqual(self.key(self.event), before)
+        self.assertEqual(self.key(self.other), other)
+
+    def test_writes_without_signals_change_the_key(self):
+        # The version bump never happens, but updated_at still moves.
+        before = self.key(self.event)
+
+        Event.objects.filter(pk=self.event.pk).update(
+            location="Chittagong", updated_at=timezone.now()
+        )
+
+        self.assertNotEqual(self.key(self.event), before)
+
+    def test_bump_all_versions_changes_every_key(self):
+        before = [self.key(self.event), self.key(self.other)]
+
+        bump_all_versions()
+
+        after = [self.key(self.event), self.key(self.other)]
+        self.assertNotEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+
+    def test_template_tag_reuses_the_cached_markup(self):
+        template = Template(
+            "{% load event_fragments %}"
+            "{% eventfragment 'card' event %}{{ event.name }}{% endeventfragment %}"
+        )
+
+        def render():
+            event = Event.objects.get(pk=self.event.pk)
+            return template.render(Context({"event": event}))
+
+        stats = fragment_stats()
+
+        self.assertEqual(render(), "Concert")
+        self.assertEqual(render(), "Concert")
+        self.event.name = "Gig"
+        self.event.save()
+        self.assertEqual(render(), "Gig")
+
+        after = fragment_stats()
+        self.assertEqual(after["hits"] - stats["hits"], 1)
+        self.assertEqual(after["misses"] - stats["misses"], 2)
+
+
+class EventImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.music = Category.objects.create(name="Music")
+        make_users(3)
+
+    def row(self, **fields):
+        row = {
+            "name": "Gig",
+            "description": "Live",
+            "date": "2030-05-01",
+            "time": "19:30",
+            "location": "Dhaka",
+            "category": "Music",
+            "participants": [],
+        }
+        row.update(fields)
+        return row
+
+    def jsonl(self, *rows, **options):
+        lines = [row if isinstance(row, str) else json.dumps(row) for row in rows]
+        return import_events(io.StringIO("\n".join(lines) + "\n"), "jsonl", **options)
+
+    def test_valid_rows_are_imported_with_their_rsvps(self):
+        report = self.jsonl(
+            self.row(name="One", organizer="user0", participants=["user1", "user2"]),
+            self.row(name="Two", participants="user1"),
+        )
+
+        self.assertEqual(report, {"events": 2, "participants": 3, "errors": []})
+        one = Event.objects.get(name="One")
+        self.assertEqual(one.created_by.username, "user0")
+        self.assertEqual(one.rsvp_count, 2)
+        self.assertEqual(Event.objects.get(name="Two").rsvp_count, 1)
+
+    def test_bad_rows_are_reported_by_line_and_skipped(self):
+        report = self.jsonl(
+            self.row(name="Good"),
+            "{not json",
+            "[1, 2]",
+            self.row(name=""),
+            self.row(category="Theatre"),
+            self.row(organizer="nobody"),
+            self.row(participants=["user0", "ghost"]),
+            self.row(capacity=1, participants=["user0", "user1"]),
+        )
+
+        self.assertEqual(report["events"], 1)
+        errors = dict(report["errors"])
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(errors[2], "not a JSON object")
+        self.assertEqual(errors[3], "not a JSON object")
+        self.assertTrue(errors[4].startswith("name:"))
+        self.assertEqual(errors[5], "category: unknown category 'Theatre'")
+        self.assertEqual(errors[6], "organizer: unknown user 'nobody'")
+        self.assertEqual(errors[7], "participants: unknown user(s) ghost")
+        self.assertEqual(errors[8], "participants: 2 exceed capacity 1")
+        self.assertEqual(list(Event.objects.values_list("name", flat=True)), ["Good"])
+
+    def test_values_that_are_not_names_are_row_errors(self):
+        report = self.jsonl(
+            self.row(category=["Music"]),
+            self.row(organizer={"username": "user0"}),
+            self.row(participants=[["user0"]]),
+            self.row(participants={"user0": True}),
+            self.row(name="Good"),
+        )
+
+        self.assertEqual(report["events"], 1)
+        self.assertEqual(
+            report["errors"],
+            [
+                (1, "category: expected a name, not list"),
+                (2, "organizer: expected a name, not dict"),
+                (3, "participants: expected a list of usernames"),
+                (4, "participants: expected a list of usernames"),
+            ],
+        )
+
+    def test_blank_lines_are_skipped_but_counted(self):
+        report = self.jsonl(self.row(), "", "{}")
+
+        self.assertEqual(report["events"], 1)
+        self.assertEqual([line for line, _ in report["errors"]], [3])
+
+    def test_unknown_categories_can_be_created(self):
+        report = self.jsonl(self.row(category="Theatre"), create_categories=True)
+
+        self.assertEqual(report["errors"], [])
+        self.assertTrue(Category.objects.filter(name="Theatre").exists())
+
+    def test_dry_run_writes_nothing(self):
+        report = self.jsonl(
+            self.row(category="Theatre", participants=["user0"]),
+            self.row(organizer="nobody"),
+            create_categories=True,
+            dry_run=True,
+        )
+
+        self.assertEqual(report["events"], 1)
+        self.assertEqual(report["participants"], 1)
+        self.assertEqual(len(report["errors"]), 1)
+        self.assertFalse(Event.objects.exists())
+        self.assertFalse(Category.objects.filter(name="Theatre").exists())
+
+    def test_csv_errors_report_file_lines(self):
+        stream = io.StringIO(
+            "name,description,date,time,location,category,organizer,participants\n"
+            "Gig,Live,2030-05-01,19:30,Dhaka,Music,user0,user1 user2\n"
+            "Gig,Live,not a date,19:30,Dhaka,Music,,\n"
+            "Gig,Live,2030-05-01,19:30,Dhaka,Music,,ghost\n"
+        )
+
+        report = import_events(stream, "csv")
+
+        self.assertEqual(report["events"], 1)
+        self.assertEqual(report["participants"], 2)
+        self.assertEqual([line for line, _ in report["errors"]], [3, 4])
+        self.assertTrue(report["errors"][0][1].startswith("date:"))
+
+    def test_exports_import_back(self):
+        event = make_event(self.music, capacity=5)
+        event.participants.add(*User.objects.all())
+
+        for format, export in (("csv", iter_csv), ("jsonl", iter_jsonl)):
+            with self.subTest(format=format):
+                stream = io.StringIO("".join(export()))
+                report = import_events(stream, format, dry_run=True)
+
+                self.assertEqual(report, {"events": 1, "participants": 3, "errors": []})
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.music = Category.objects.create(name="Music")
+        cls.sports = Category.objects.create(name="Sports")
+        cls.user, cls.other = make_users(2)
+
+    def recommend(self, limit=6):
+        with mock.patch(
+            "events.recommendations.refresh_user", wraps=refresh_user
+        ) as refresh:
+            events = recommended_events(self.user, limit)
+        return events, refresh.called
+
+    def test_first_read_computes_the_list(self):
+        event = make_event(self.music)
+
+        events, refreshed = self.recommend()
+
+        self.assertEqual(events, [event])
+        self.assertTrue(refreshed)
+        self.assertTrue(RecommendationRefresh.objects.filter(user=self.user).exists())
+
+    def test_empty_list_is_not_recomputed_on_every_read(self):
+        self.assertEqual(self.recommend(), ([], True))
+        self.assertEqual(self.recommend(), ([], False))
+
+    def test_short_list_is_recomputed_once_it_ages(self):
+        self.recommend()
+        event = make_event(self.music)
+        aged = timezone.now() - SHORT_LIST_MAX_AGE - datetime.timedelta(minutes=1)
+        RecommendationRefresh.objects.update(refreshed_at=aged)
+
+        self.assertEqual(self.recommend(), ([event], True))
+
+    def test_list_that_ran_short_is_rebuilt(self):
+        events = [make_event(self.music, name=f"Gig {i}") for i in range(3)]
+        self.recommend(limit=2)
+        # A queryset update, so no signal drops the list.
+        Event.objects.filter(pk=events[0].pk).update(
+            date=datetime.date.today() - datetime.timedelta(days=1)
+        )
+        Recommendation.objects.filter(user=self.user).exclude(
+            event__in=events[:2]
+        ).delete()
+
+        shown, refreshed = self.recommend(limit=2)
+
+        self.assertTrue(refreshed)
+        self.assertEqual(set(shown), set(events[1:]))
+
+    def test_rsvp_drops_only_that_users_list(self):
+        event = make_event(self.music)
+        recommended_events(self.user)
+        recommended_events(self.other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rsvp.rsvp(event, self.user)
+
+        self.assertFalse(Recommendation.objects.filter(user=self.user).exists())
+        self.assertFalse(CategoryAffinity.objects.filter(user=self.user).exists())
+        self.assertFalse(RecommendationRefresh.objects.filter(user=self.user).exists())
+        self.assertTrue(RecommendationRefresh.objects.filter(user=self.other).exists())
+        self.assertEqual(self.recommend(), ([], True))
+
+    def test_new_events_are_offered_to_users_who_favour_their_category(self):
+        self.user.rsvp_events.add(make_event(self.music))
+        self.recommend()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gig = make_event(self.music, name="Gig")
+            make_event(self.sports, name="Match")
+
+        offered = Recommendation.objects.filter(user=self.user)
+        self.assertEqual(list(offered.values_list("event", flat=True)), [gig.pk])
+        self.assertEqual(self.recommend(limit=1), ([gig], False))
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.music = Category.objects.create(name="Music")
+
+    def setUp(self):
+        caches[PAGE_CACHE].clear()
+        caches[FRAGMENT_CACHE].clear()
+        self.event = make_event(self.music)
+
+    def get(self, path="/"):
+        before = page_cache_stats()
+        response = self.client.get(path)
+        after = page_cache_stats()
+        outcome = [k for k in ("hits", "stale", "misses") if after[k] > before[k]]
+        # Every response carries its own CSRF token.
+        content = re.sub(
+            r'name="csrfmiddlewaretoken" value="[^"]*"', "", response.content.decode()
+        )
+        return content, outcome[0] if outcome else None
+
+    def key(self, path="/"):
+        request = RequestFactory().get(path)
+        request.GET = _normalized_params(request)
+        return _page_key(request)
+
+    def expire(self):
+        entry = caches[PAGE_CACHE].get(self.key())
+        entry["fresh_until"] = 0
+        caches[PAGE_CACHE].set(self.key(), entry)
+
+    def test_second_visit_is_a_hit(self):
+        first, outcome = self.get()
+        self.assertEqual(outcome, "misses")
+
+        second, outcome = self.get()
+        self.assertEqual(outcome, "hits")
+        self.assertEqual(second, first)
+        self.assertIn("Concert", second)
+
+    def test_unknown_query_parameters_share_the_entry(self):
+        self.get()
+
+        self.assertEqual(self.get("/?utm_source=mail")[1], "hits")
+
+    def test_signed_in_visitors_bypass_the_cache(self):
+        self.client.force_login(User.objects.create_user("member"))
+
+        self.assertIsNone(self.get()[1])
+        self.assertIsNone(caches[PAGE_CACHE].get(self.key()))
+
+    def test_saving_an_event_on_the_page_re_renders_it(self):
+        self.get()
+
+        self.event.name = "Jazz night"
+        self.event.save()
+
+        content, outcome = self.get()
+        self.assertEqual(outcome, "misses")
+        self.assertIn("Jazz night", content)
+
+    def test_writes_without_signals_re_render_it(self):
+        self.get()
+
+        Event.objects.update(name="Jazz night", updated_at=timezone.now())
+
+        content, outcome = self.get()
+        self.assertEqual(outcome, "misses")
+        self.assertIn("Jazz night", content)
+
+    def test_entries_expire(self):
+        self.get()
+        self.expire()
+
+        self.assertEqual(self.get()[1], "misses")
+        self.assertEqual(self.get()[1], "hits")
+
+    def test_outdated_page_is_served_stale_while_another_request_renders(self):
+        self.get()
+        self.expire()
+        key = self.key()
+        Event.objects.update(name="Jazz night", updated_at=timezone.now())
+        caches[PAGE_CACHE].add(f"{key}:lock", True)
+
+        content, outcome = self.get()
+        self.assertEqual(outcome, "stale")
+        self.assertIn("Concert", content)
+
+        caches[PAGE_CACHE].delete(f"{key}:lock")
+        content, outcome = self.get()
+        self.assertEqual(outcome, "misses")
+        self.assertIn("Jazz night", content)
+
+    def test_missing_page_waits_for_the_render_in_progress(self):
+        self.get()
+        key = self.key()
+        entry = caches[PAGE_CACHE].get(key)
+        caches[PAGE_CACHE].delete(key)
+        caches[PAGE_CACHE].add(f"{key}:lock", True)
+
+        def rendered(seconds):
+            caches[PAGE_CACHE].set(key, entry)
+
+        with mock.patch("events.pagecache.time.sleep", side_effect=rendered):
+            self.assertEqual(self.get()[1], "hits")
+
+
+class SyntheticDataTests(TestCase):
+    def test_role_usernames(self):
+        summary = generate(
+            users=5, events=3, categories=2, organizers=2, role_usernames=True
+        )
+
+        self.assertEqual(summary["organizers"], 2)
+        self.assertEqual(
+            sorted(User.objects.values_list("username", flat=True)),
+            ["organizer_1", "organizer_2"]
+            + ["participant_1", "participant_2", "participant_3"],
+        )
+        organizers = User.objects.filter(groups__name="Organizer")
+        self.assertTrue(organizers.filter(username="organizer_1").exists())
+
+    def test_second_run_raises_dataset_exists(self):
+        generate(users=3, events=2, categories=1, prefix="demo")
+
+        with self.assertRaises(DatasetExists):
+            generate(users=3, events=2, categories=1, prefix="demo")
+        generate(users=3, events=2, categories=1, prefix="other")
+        self.assertEqual(User.objects.count(), 6)
+
+    def test_users_without_events(self):
+        summary = generate(users=20, events=0, categories=0, rsvps_per_user=5)
+
+        self.assertEqual(summary["rsvps"], 0)
+        self.assertEqual(User.objects.count(), 20)
+
+    def test_events_need_a_category(self):
+        with self.assertRaises(ValueError):
+            generate(users=2, events=1, categories=0)
+
+
+class QueryInspectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.music = Category.objects.create(name="Music")
+        for i in range(3):
+            make_event(cls.music, name=f"Event {i}")
+
+    def run_n_plus_one(self):
+        for event in Event.objects.order_by("id"):
+            Category.objects.get(pk=event.category_id)
+
+    def test_fingerprint_collapses_literals(self):
+        first = "SELECT * FROM t WHERE id = 1 AND name = 'x' AND k IN (%s, %s)"
+        second = "SELECT * FROM t WHERE id = 22 AND name = 'it''s' AND k IN (%s)"
+
+        self.assertEqual(fingerprint(first), fingerprint(second))
+
+    def test_repeated_shapes_are_reported(self):
+        with self.assertLogs("events.querylog.nplusone", "WARNING") as logs:
+            with inspect_queries("listing", threshold=3, slow_ms=10_000):
+                self.run_n_plus_one()
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Possible N+1 in listing: 3 runs", logs.output[0])
+
+    def test_report_runs_when_the_block_raises(self):
+        with self.assertLogs("events.querylog.nplusone", "WARNING") as logs:
+            with self.assertRaises(RuntimeError):
+                with inspect_queries("failing", threshold=3, slow_ms=10_000):
+                    self.run_n_plus_one()
+                    raise RuntimeError
+
+        self.assertIn("Possible N+1 in failing", logs.output[0])
+
+
+class MediaServingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = Path(tempfile.mkdtemp())
+        cls.media_root = cls.root / "media"
+        (cls.media_root / "events_img").mkdir(parents=True)
+        (cls.media_root / "private").mkdir()
+        (cls.media_root / "events_img" / "poster.webp").write_bytes(b"0123456789")
+        (cls.media_root / "private" / "report.csv").write_bytes(b"a,b\n")
+        (cls.root / "secret.txt").write_bytes(b"secret")
+        cls.settings_override = override_settings(
+            MEDIA_ROOT=str(cls.media_root), MEDIA_ACCEL=""
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", password="x", is_staff=True)
+        cls.member = User.objects.create_user("member", password="x")
+
+    def content(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_anonymous_visitor_reads_public_files(self):
+        response = self.client.get("/media/events_img/poster.webp")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), b"0123456789")
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertTrue(response["Cache-Control"].startswith("public"))
+
+    def test_anonymous_visitor_cannot_read_private_files(self):
+        response = self.client.get("/media/private/report.csv")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_private_files_are_for_staff_only(self):
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get("/media/private/report.csv").status_code, 404)
+
+        self.client.force_login(self.staff)
+        response = self.client.get("/media/private/report.csv")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), b"a,b\n")
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+    def test_range_request(self):
+        response = self.client.get(
+            "/media/events_img/poster.webp", HTTP_RANGE="bytes=2-4"
+        )
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(self.content(response), b"234")
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(
+            "/media/events_img/poster.webp", HTTP_RANGE="bytes=10-"
+        )
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_malformed_range_sends_the_whole_file(self):
+        response = self.client.get(
+            "/media/events_img/poster.webp", HTTP_RANGE="bytes=5-2"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), b"0123456789")
+
+    def test_path_traversal_is_refused(self):
+        self.client.force_login(self.staff)
+
+        for path in (
+            "/media/events_img/../../secret.txt",
+            "/media/../secret.txt",
+            "/media/%2e%2e/secret.txt",
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 404)
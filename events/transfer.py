@@ -0,0 +1,306 @@
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Prefetch
+
+from events.forms import EventImportForm
+from events.fragments import bump_category_version, bump_listing_versions
+from events.models import Category, Event
+from events.search import index_events
+from events.stats import invalidate_dashboard_stats
+
+FIELDS = (
+    "id",
+    "name",
+    "description",
+    "date",
+    "time",
+    "location",
+    "category",
+    "organizer",
+    "capacity",
+    "rsvp_count",
+    "participants",
+)
+CHUNK_SIZE = 1000
+
+# Stay well under SQLite's limit on query parameters.
+LOOKUP_BATCH = 500
+
+CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+Participant = Event.participants.through
+
+
+def _batches(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+# Export
+
+
+def export_queryset(queryset=None):
+    queryset = Event.objects.all() if queryset is None else queryset
+    usernames = User.objects.only("username").order_by("username")
+    return (
+        queryset.select_related("category", "created_by")
+        .prefetch_related(Prefetch("participants", queryset=usernames))
+        .order_by("id")
+    )
+
+
+def _export_row(event):
+    return {
+        "id": event.pk,
+        "name": event.name,
+        "description": event.description,
+        "date": event.date.isoformat(),
+        "time": event.time.isoformat(),
+        "location": event.location,
+        "category": event.category.name,
+        "organizer": event.created_by.username if event.created_by else "",
+        "capacity": event.capacity,
+        "rsvp_count": event.rsvp_count,
+        "participants": [user.username for user in event.participants.all()],
+    }
+
+
+def iter_rows(queryset=None, chunk_size=CHUNK_SIZE):
+    # iterator() fetches and prefetches one chunk at a time, so memory stays
+    # flat however large the table is.
+    for event in export_queryset(queryset).iterator(chunk_size=chunk_size):
+        yield _export_row(event)
+
+
+class _Echo:
+    """Lets csv.writer hand each encoded line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset=None, chunk_size=CHUNK_SIZE):
+    writer = csv.DictWriter(_Echo(), fieldnames=FIELDS)
+    yield writer.writeheader()
+    for row in iter_rows(queryset, chunk_size):
+        # Usernames cannot contain spaces.
+        row["participants"] = " ".join(row["participants"])
+        yield writer.writerow(row)
+
+
+def iter_jsonl(queryset=None, chunk_size=CHUNK_SIZE):
+    for row in iter_rows(queryset, chunk_size):
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+EXPORTERS = {"csv": iter_csv, "jsonl": iter_jsonl}
+
+
+# Import
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        row["participants"] = (row.get("participants") or "").split()
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            yield line, None
+            continue
+
+        participants = row.get("participants") or []
+        if isinstance(participants, str):
+            participants = participants.split()
+        row["participants"] = participants
+        yield line, row
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+class _Lookups:
+    """Name-to-id maps filled a chunk at a time, so each name is queried once."""
+
+    def __init__(self, create_categories):
+        self.create_categories = create_categories
+        self.categories = dict(Category.objects.values_list("name", "id"))
+        self.users = {}
+
+    def load_users(self, usernames):
+        missing = set(usernames) - self.users.keys()
+        for batch in _batches(missing, LOOKUP_BATCH):
+            self.users.update(
+                User.objects.filter(username__in=batch).values_list("username", "id")
+            )
+        # Remember misses too, so they are not looked up again.
+        self.users.update((name, None) for name in missing - self.users.keys())
+
+    def load_categories(self, names, dry_run):
+        max_length = Category._meta.get_field("name").max_length
+        missing = {
+            name
+            for name in names
+            if name and name not in self.categories and len(name) <= max_length
+        }
+        if not missing or not self.create_categories:
+            return
+
+        if dry_run:
+            self.categories.update((name, 0) for name in missing)
+            return
+
+        Category.objects.bulk_create(
+            [Category(name=name) for name in missing], ignore_conflicts=True
+        )
+        for batch in _batches(missing, LOOKUP_BATCH):
+            created = dict(
+                Category.objects.filter(name__in=batch).values_list("name", "id")
+            )
+            self.categories.update(created)
+            # bulk_create sends no signals; every listing's category picker
+            # has to show the new names.
+            for category_id in created.values():
+                bump_category_version(category_id)
+
+
+def _shape_error(row):
+    """Why the names in ``row`` cannot be looked up, or None if they can."""
+
+    for field in ("category", "organizer"):
+        value = row.get(field)
+        if value is not None and not isinstance(value, str):
+            return f"{field}: expected a name, not {type(value).__name__}"
+    participants = row["participants"]
+    if not isinstance(participants, list) or not all(
+        isinstance(name, str) for name in participants
+    ):
+        return "participants: expected a list of usernames"
+    return None
+
+
+def _build_event(row, lookups):
+    """Return ``(event, participant_ids)`` for a valid row, or raise ValueError."""
+
+    form = EventImportForm(data=row)
+    if not form.is_valid():
+        raise ValueError(
+            "; ".join(
+                f"{field}: {' '.join(messages)}"
+                for field, messages in form.errors.items()
+            )
+        )
+
+    category_id = lookups.categories.get(row.get("category") or "")
+    if category_id is None:
+        raise ValueError(f"category: unknown category {row.get('category')!r}")
+
+    organizer = row.get("organizer") or ""
+    organizer_id = lookups.users.get(organizer) if organizer else None
+    if organizer and organizer_id is None:
+        raise ValueError(f"organizer: unknown user {organizer!r}")
+
+    unknown = [
+        name for name in row["participants"] if lookups.users.get(name) is None
+    ]
+    if unknown:
+        raise ValueError(f"participants: unknown user(s) {', '.join(unknown)}")
+    participant_ids = {lookups.users[name] for name in row["participants"]}
+
+    event = form.save(commit=False)
+    if event.capacity is not None and len(participant_ids) > event.capacity:
+        raise ValueError(
+            f"participants: {len(participant_ids)} exceed capacity {event.capacity}"
+        )
+
+    event.category_id = category_id
+    event.created_by_id = organizer_id
+    event.rsvp_count = len(participant_ids)
+    return event, participant_ids
+
+
+def _import_chunk(chunk, lookups, report, dry_run):
+    # JSON rows may hold lists or objects where names belong, which cannot
+    # be looked up, so they are turned away before the lookups are loaded.
+    checked = [
+        (line, row, "not a JSON object" if row is None else _shape_error(row))
+        for line, row in chunk
+    ]
+    rows = [row for _, row, error in checked if error is None]
+    lookups.load_users(
+        [row["organizer"] for row in rows if row.get("organizer")]
+        + [name for row in rows for name in row["participants"]]
+    )
+    lookups.load_categories([row.get("category") for row in rows], dry_run)
+
+    built = []
+    for line, row, error in checked:
+        if error is None:
+            try:
+                built.append(_build_event(row, lookups))
+                continue
+            except ValueError as e:
+                error = str(e)
+        report["errors"].append((line, error))
+
+    if dry_run or not built:
+        report["events"] += len(built)
+        report["participants"] += sum(len(ids) for _, ids in built)
+        return
+
+    with transaction.atomic():
+        events = Event.objects.bulk_create([event for event, _ in built])
+        participants = Participant.objects.bulk_create(
+            [
+                Participant(event_id=event.pk, user_id=user_id)
+                for event, user_ids in built
+                for user_id in user_ids
+            ],
+            batch_size=CHUNK_SIZE,
+        )
+        index_events(event.pk for event in events)
+
+    # The new events join their categories' listings; bulk_create sends no
+    # signals, so the cached pages would otherwise keep leaving them out.
+    bump_listing_versions(*{event.category_id for event in events})
+
+    report["events"] += len(events)
+    report["participants"] += len(participants)
+
+
+def import_events(
+    stream, format, chunk_size=CHUNK_SIZE, create_categories=False, dry_run=False
+):
+    """
+    Load events and their RSVPs from a CSV or JSON Lines ``stream`` in
+    chunks of ``chunk_size`` rows, each written with bulk_create in its own
+    transaction. Rows failing EventForm's rules, naming an unknown category
+    or user, or holding something other than names in those fields are
+    skipped and reported as ``(line, message)``.
+    """
+
+    rows = READERS[format](stream)
+    lookups = _Lookups(create_categories)
+    report = {"events": 0, "participants": 0, "errors": []}
+
+    while chunk := list(islice(rows, chunk_size)):
+        _import_chunk(chunk, lookups, report, dry_run)
+
+    if report["events"] and not dry_run:
+        # bulk_create sends no signals.
+        invalidate_dashboard_stats()
+    return report
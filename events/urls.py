@@ -4,6 +4,7 @@ from events.views import (
     event_detail,
     event,
     category_dashboard,
+    category_events,
     participant_dashboard,
     create_event,
     update_event,
@@ -13,6 +14,9 @@ from events.views import (
     delete_category,
     rsvp_event,
     cancel_rsvp,
+    cache_stats,
+    metrics,
+    export_events,
 )
 
 
@@ -26,6 +30,14 @@ urlpatterns = [
         name="participant_dashboard",
     ),
     path("dashboard/CategoryDashboard", category_dashboard, name="category_dashboard"),
+    path(
+        "dashboard/CategoryDashboard/<int:category_id>/",
+        category_events,
+        name="category_events",
+    ),
+    path("dashboard/cache-stats/", cache_stats, name="cache_stats"),
+    path("dashboard/metrics/", metrics, name="metrics"),
+    path("dashboard/export/", export_events, name="export_events"),
     path("form/create_event/", create_event, name="create_event"),
     path("form/update_event/<int:event_id>/", update_event, name="update_event"),
     path("form/delete_event/<int:event_id>/", delete_event, name="delete_event"),
@@ -1,17 +1,40 @@
-from PIL import Image
+from PIL import Image, features
+import hashlib
+import io
 import os
+import posixpath
+import re
+
+
+def get_user_groups(user):
+    """
+    Return the names of the user's groups, loaded from the database at most
+    once per request (memoized on the user object). They are not cached
+    across requests: a per-process cache would keep a revoked role alive in
+    every other worker.
+    """
+
+    if not user.is_authenticated:
+        return frozenset()
+
+    groups = getattr(user, "_group_names", None)
+    if groups is None:
+        groups = frozenset(user.groups.values_list("name", flat=True))
+        user._group_names = groups
+
+    return groups
 
 
 def is_admin(user):
-    return user.groups.filter(name="Admin").exists()
+    return "Admin" in get_user_groups(user)
 
 
 def is_organizer(user):
-    return user.groups.filter(name="Organizer").exists()
+    return "Organizer" in get_user_groups(user)
 
 
 def is_participant(user):
-    return user.groups.filter(name="Participant").exists()
+    return "Participant" in get_user_groups(user)
 
 
 def get_user_role(user):
@@ -25,51 +48,138 @@ def get_user_role(user):
         return "User"
 
 
-def optimize_image_for_web(image_field, max_width=1920, max_height=1080, quality=85):
+VARIANT_WIDTHS = (320, 640, 1280, 1920)
+VARIANT_FORMATS = {"avif": ("AVIF", 60), "webp": ("WebP", 80)}
+
+
+def _flatten(img):
+    if img.mode in ("RGBA", "LA", "P"):
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        if img.mode == "P":
+            img = img.convert("RGBA")
+        background.paste(img, mask=img.split()[-1] if img.mode == "RGBA" else None)
+        return background
+    return img.convert("RGB")
+
+
+# Optimized images are named after a hash of their contents, so a URL always
+# means the same bytes and media can be cached as immutable.
+HASH_LENGTH = 12
+HASHED_NAME = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}\.\w+$")
+
+
+def _unhashed_stem(name):
+    stem = os.path.splitext(name)[0]
+    if HASHED_NAME.search(name):
+        stem = os.path.splitext(stem)[0]
+    return stem
+
+
+def _save_hashed(img, storage, stem, ext, image_format, quality):
+    # Encode in memory to learn the name, then write through a temporary
+    # file so readers never see a half-written image. A file that already
+    # has this name already has these bytes.
+    buffer = io.BytesIO()
+    img.save(buffer, image_format, quality=quality)
+    data = buffer.getvalue()
+    name = f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}.{ext}"
+
+    path = storage.path(name)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return name
+
+
+def _variant_formats():
+    return {
+        ext: options
+        for ext, options in VARIANT_FORMATS.items()
+        if features.check(ext)
+    }
+
+
+def optimize_image_for_web(
+    image_field,
+    max_width=1920,
+    max_height=1080,
+    quality=85,
+    widths=VARIANT_WIDTHS,
+):
+    """
+    Encode the stored image as a web-sized WebP plus a ladder of smaller
+    AVIF/WebP variants, decoding the source only once.
+
+    Returns ``(webp_name, variants)`` where each variant is a dict with
+    ``width``, ``height``, ``format`` and ``name``, or None if the file
+    could not be processed. Every name carries a hash of the file's
+    contents. The original file and the field are untouched.
+    """
 
     if not image_field or not hasattr(image_field, "path"):
-        return False
+        return None
 
     try:
-        image_path = image_field.path
-
-        with Image.open(image_path) as img:
-
-            original_width, original_height = img.size
-
-            if original_width > max_width or original_height > max_height:
-
-                width_ratio = max_width / original_width
-                height_ratio = max_height / original_height
-                scale_factor = min(width_ratio, height_ratio)
-
-                new_width = int(original_width * scale_factor)
-                new_height = int(original_height * scale_factor)
-
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-            if img.mode in ("RGBA", "LA", "P"):
-                background = Image.new("RGB", img.size, (255, 255, 255))
-                if img.mode == "P":
-                    img = img.convert("RGBA")
-                background.paste(
-                    img, mask=img.split()[-1] if img.mode == "RGBA" else None
+        storage = image_field.storage
+
+        with Image.open(image_field.path) as source:
+            img = _flatten(source)
+
+        original_width, original_height = img.size
+
+        if original_width > max_width or original_height > max_height:
+
+            width_ratio = max_width / original_width
+            height_ratio = max_height / original_height
+            scale_factor = min(width_ratio, height_ratio)
+
+            new_width = int(original_width * scale_factor)
+            new_height = int(original_height * scale_factor)
+
+            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+        stem = _unhashed_stem(image_field.name)
+        webp_name = _save_hashed(img, storage, stem, "webp", "WebP", quality)
+
+        variants = []
+        ladder = sorted({w for w in widths if w < img.width} | {img.width})
+        formats = _variant_formats()
+        variant_dir, variant_stem = posixpath.split(stem)
+        variant_base = posixpath.join(variant_dir, "variants", variant_stem)
+
+        # Walk the ladder from the largest width down, resizing each step
+        # from the previous one so every resize works on a smaller input.
+        current = img
+        for width in reversed(ladder):
+            if width != current.width:
+                height = max(1, round(current.height * width / current.width))
+                current = current.resize((width, height), Image.Resampling.LANCZOS)
+
+            for ext, (image_format, variant_quality) in formats.items():
+                if ext == "webp" and width == img.width:
+                    name = webp_name
+                else:
+                    name = _save_hashed(
+                        current,
+                        storage,
+                        f"{variant_base}-{width}w",
+                        ext,
+                        image_format,
+                        variant_quality,
+                    )
+                variants.append(
+                    {
+                        "width": current.width,
+                        "height": current.height,
+                        "format": ext,
+                        "name": name,
+                    }
                 )
-                img = background
-
-            base_name = os.path.splitext(image_path)[0]
-            webp_path = f"{base_name}.webp"
-
-            img.save(webp_path, "WebP", quality=quality, optimize=True)
-
-            if not image_path.lower().endswith(".webp") and os.path.exists(image_path):
-                os.remove(image_path)
-
-            old_image_name = os.path.basename(image_path)
-            new_image_name = os.path.basename(webp_path)
-            image_field.name = image_field.name.replace(old_image_name, new_image_name)
 
-            return True
+        return webp_name, variants
 
-    except Exception as e:
-        return False
+    except Exception:
+        return None
@@ -1,8 +1,10 @@
 from django.contrib import messages
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.contrib.auth.models import User, Group
-from django.db.models import Count
+from events import rsvp
 from events.models import Event, Category
 from events.utils import (
     is_admin,
@@ -10,36 +12,66 @@ from events.utils import (
     is_participant,
     get_user_role,
 )
-from users.signals import send_rsvp_confirmation_email
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.db.models import prefetch_related_objects
+from events.conditional import (
+    conditional_page,
+    event_etag,
+    event_last_modified,
+    listing_etag,
+    listing_last_modified,
+    requested_event,
+)
 from events.forms import EventForm, CategoryForm
+from events.fragments import (
+    CATEGORIES_KEY,
+    category_version_key,
+    event_version_key,
+    fragment_stats,
+    listing_version_key,
+)
+from events.instrumentation import metrics_summary, prometheus_text
+from events.pagecache import cache_anonymous_page, depends_on, page_cache_stats
+from events.pagination import DATE_ORDERING, RANK_ORDERING, paginate_events
+from events.recommendations import recommended_events
+from events.search import search_events
+from events.stats import category_summaries, event_aggregates, get_dashboard_stats
+from events.transfer import CONTENT_TYPES, EXPORTERS
 
 
 def all_events():
 
     return (
         Event.objects.select_related("category", "created_by")
-        .prefetch_related("participants")
+        .prefetch_related("image_variants")
         .all()
     )
 
 
-def get_user_statistics():
-
-    group_stats = Group.objects.annotate(user_count=Count("user")).values(
-        "name", "user_count"
+def _wants_json(request):
+    return (
+        request.headers.get("x-requested-with") == "XMLHttpRequest"
+        or "application/json" in request.headers.get("accept", "")
     )
 
-    stats = {group["name"]: group["user_count"] for group in group_stats}
 
-    total_users = User.objects.count()
+def _rsvp_response(request, event, result, waitlist_position=None):
+    if not _wants_json(request):
+        return redirect(request.META.get("HTTP_REFERER", "home"))
 
-    return {
-        "total_users": total_users,
-        "admin_count": stats.get("Admin", 0),
-        "organizer_count": stats.get("Organizer", 0),
-        "participants_count": stats.get("Participant", 0),
-    }
+    rsvp_count, capacity = Event.objects.values_list("rsvp_count", "capacity").get(
+        pk=event.pk
+    )
+    return JsonResponse(
+        {
+            "status": result,
+            "attending": result in (rsvp.CREATED, rsvp.ALREADY_ATTENDING),
+            "waitlist_position": waitlist_position,
+            "rsvp_count": rsvp_count,
+            "capacity": capacity,
+        }
+    )
 
 
 @login_required
@@ -48,19 +80,26 @@ def rsvp_event(request, event_id):
     event = get_object_or_404(Event, id=event_id)
     user = request.user
 
-    if request.method == "POST":
-
-        if user not in event.participants.all():
-
-            event.participants.add(user)
-            send_rsvp_confirmation_email(user, event)
-            messages.success(request, f"Successfully RSVP'd to {event.name}!")
-        else:
-            messages.info(request, f"You have already RSVP'd to {event.name}!")
-
+    if request.method != "POST":
+        if _wants_json(request):
+            return JsonResponse({"error": "POST required"}, status=405)
         return redirect(request.META.get("HTTP_REFERER", "home"))
 
-    return redirect(request.META.get("HTTP_REFERER", "home"))
+    result = rsvp.rsvp(event, user)
+    position = None
+    if result == rsvp.CREATED:
+        messages.success(request, f"Successfully RSVP'd to {event.name}!")
+    elif result in (rsvp.WAITLISTED, rsvp.ALREADY_WAITLISTED):
+        position = rsvp.waitlist_position(event, user)
+        messages.info(
+            request,
+            f"{event.name} is full. You are #{position} on the waitlist and will "
+            "be emailed if a seat opens up.",
+        )
+    else:
+        messages.info(request, f"You have already RSVP'd to {event.name}!")
+
+    return _rsvp_response(request, event, result, position)
 
 
 @login_required
@@ -69,20 +108,24 @@ def cancel_rsvp(request, event_id):
     event = get_object_or_404(Event, id=event_id)
     user = request.user
 
-    if request.method == "POST":
-
-        if user in event.participants.all():
-
-            event.participants.remove(user)
-            messages.success(request, f"Successfully cancelled RSVP for {event.name}!")
-        else:
-            messages.info(request, f"You haven't RSVP'd to {event.name}!")
-
+    if request.method != "POST":
+        if _wants_json(request):
+            return JsonResponse({"error": "POST required"}, status=405)
         return redirect(request.META.get("HTTP_REFERER", "home"))
 
-    return redirect(request.META.get("HTTP_REFERER", "home"))
+    result = rsvp.cancel_rsvp(event, user)
+    if result == rsvp.CANCELLED:
+        messages.success(request, f"Successfully cancelled RSVP for {event.name}!")
+    elif result == rsvp.LEFT_WAITLIST:
+        messages.success(request, f"You have left the waitlist for {event.name}.")
+    else:
+        messages.info(request, f"You haven't RSVP'd to {event.name}!")
+
+    return _rsvp_response(request, event, result)
 
 
+@conditional_page(listing_etag, listing_last_modified)
+@cache_anonymous_page
 def home(request):
     events = all_events()
     query = request.GET.get("query", "").strip()
@@ -93,8 +136,10 @@ def home(request):
     if category:
         events = events.filter(category__name=category)
 
+    ordering = DATE_ORDERING
     if query:
-        events = events.filter(name__icontains=query)
+        events = search_events(events, query)
+        ordering = RANK_ORDERING
 
     if start_date and end_date:
         events = events.filter(date__range=[start_date, end_date])
@@ -103,26 +148,36 @@ def home(request):
     elif end_date:
         events = events.filter(date__lte=end_date)
 
-    categories = Category.objects.all()
+    categories = list(Category.objects.all())
+    category_id = next((c.pk for c in categories if c.name == category), None)
+    page = paginate_events(request, events, ordering=ordering)
+    depends_on(
+        request,
+        CATEGORIES_KEY,
+        listing_version_key(category_id),
+        *(event_version_key(event.pk) for event in page.object_list),
+    )
 
     context = {
-        "events": events,
+        "events": page.object_list,
+        "page": page,
         "categories": categories,
     }
 
     return render(request, "home.html", context)
 
 
+@conditional_page(event_etag, event_last_modified)
+@cache_anonymous_page
 def event_detail(request, event_id):
-    try:
-        event = (
-            Event.objects.select_related("category")
-            .prefetch_related("participants")
-            .get(id=event_id)
-        )
-    except Event.DoesNotExist:
+    event = requested_event(request, event_id)
+    if event is None:
         messages.error(request, "Event not found.")
         return redirect("home")
+    prefetch_related_objects([event], "image_variants")
+    depends_on(
+        request, event_version_key(event.pk), category_version_key(event.category_id)
+    )
 
     context = {
         "event": event,
@@ -134,8 +189,6 @@ def event_detail(request, event_id):
 @login_required
 def dashboard(request):
 
-    user_role = get_user_role(request.user)
-
     if is_admin(request.user):
         return admin_dashboard(request)
     elif is_organizer(request.user):
@@ -154,17 +207,14 @@ def admin_dashboard(request):
     events = all_events()
     current_date = timezone.now().date()
 
-    user_stats = get_user_statistics()
+    page = paginate_events(request, events)
 
     context = {
-        "events": events,
+        "events": page.object_list,
+        "page": page,
         "today_events": events.filter(date=current_date),
-        "upcoming_events": Event.objects.filter(date__gte=current_date),
-        "past_events": Event.objects.filter(date__lt=current_date),
-        "total_events": Event.objects.count(),
-        "total_categories": Category.objects.count(),
         "user_role": "Admin",
-        **user_stats,
+        **get_dashboard_stats(),
     }
 
     return render(request, "dashboard/AdminDashboard.html", context)
@@ -174,24 +224,15 @@ def admin_dashboard(request):
 @user_passes_test(is_organizer)
 def organizer_dashboard(request):
 
-    events = Event.objects.filter(created_by=request.user).prefetch_related(
-        "participants"
-    )
+    events = Event.objects.filter(created_by=request.user).select_related("category")
     current_date = timezone.now().date()
 
-    total_rsvps = sum(event.participants.count() for event in events)
-
-    user_stats = get_user_statistics()
-
     context = {
         "events": events,
         "today_events": events.filter(date=current_date),
-        "upcoming_events": events.filter(date__gte=current_date),
-        "past_events": events.filter(date__lt=current_date),
-        "total_rsvps": total_rsvps,
-        "my_events_count": events.count(),
         "user_role": "Organizer",
-        "participants_count": user_stats["participants_count"],
+        "participants_count": get_dashboard_stats()["participants_count"],
+        **events.aggregate(**event_aggregates(current_date)),
     }
 
     return render(request, "dashboard/OrganizerDashboard.html", context)
@@ -200,33 +241,62 @@ def organizer_dashboard(request):
 @login_required
 def participant_dashboard(request):
 
-    user_rsvps = Event.objects.filter(participants=request.user).select_related(
-        "category"
-    )
-    current_date = timezone.now().date()
-
-    available_events = (
-        Event.objects.filter(date__gte=current_date)
-        .exclude(participants=request.user)
+    user_rsvps = (
+        Event.objects.filter(participants=request.user)
         .select_related("category")
+        .prefetch_related("image_variants")
     )
+    current_date = timezone.now().date()
 
-    user_stats = get_user_statistics()
+    site_stats = get_dashboard_stats()
+    own_stats = user_rsvps.aggregate(**event_aggregates(current_date))
 
     context = {
         "events": user_rsvps,
         "user_rsvps": user_rsvps,
         "today_events": user_rsvps.filter(date=current_date),
-        "upcoming_events": user_rsvps.filter(date__gte=current_date),
-        "past_events": user_rsvps.filter(date__lt=current_date),
-        "available_events": available_events,
+        "recommended_events": recommended_events(request.user),
+        # Every upcoming event less the ones already RSVPed, from the cached
+        # site totals rather than an anti-join over the whole catalog.
+        "available_count": max(
+            0, site_stats["upcoming_count"] - own_stats["upcoming_count"]
+        ),
         "user_role": "Participant",
-        "participants_count": user_stats["participants_count"],
+        "participants_count": site_stats["participants_count"],
+        **own_stats,
     }
 
     return render(request, "dashboard/ParticipantDashboard.html", context)
 
 
+@login_required
+@user_passes_test(is_admin)
+def cache_stats(request):
+    return JsonResponse({"fragments": fragment_stats(), "pages": page_cache_stats()})
+
+
+def _has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    return bool(token) and constant_time_compare(
+        request.headers.get("authorization", ""), f"Bearer {token}"
+    )
+
+
+def metrics(request):
+    """
+    Request metrics as JSON for admins, or in Prometheus text format with
+    ``?format=prometheus``, which a scraper may fetch with METRICS_TOKEN.
+    """
+
+    scraper = _has_metrics_token(request)
+    if not (scraper or is_admin(request.user)):
+        raise PermissionDenied
+
+    if scraper or request.GET.get("format") == "prometheus":
+        return HttpResponse(prometheus_text(), content_type="text/plain; version=0.0.4")
+    return JsonResponse(metrics_summary())
+
+
 @login_required
 def event(request):
     if not (is_admin(request.user) or is_organizer(request.user)):
@@ -241,13 +311,30 @@ def event(request):
         return render(request, "error/access_denied.html", context)
 
     events = all_events()
+    page = paginate_events(request, events)
     context = {
-        "events": events,
+        "events": page.object_list,
+        "page": page,
+        "total_events": events.count(),
     }
 
     return render(request, "dashboard/EventDashboard.html", context)
 
 
+@login_required
+@user_passes_test(lambda u: is_admin(u) or is_organizer(u))
+def export_events(request):
+    format = request.GET.get("format", "csv")
+    if format not in EXPORTERS:
+        raise Http404("Unknown export format")
+
+    response = StreamingHttpResponse(
+        EXPORTERS[format](), content_type=CONTENT_TYPES[format]
+    )
+    response["Content-Disposition"] = f'attachment; filename="events.{format}"'
+    return response
+
+
 @login_required
 def category_dashboard(request):
 
@@ -262,7 +349,7 @@ def category_dashboard(request):
         }
         return render(request, "error/access_denied.html", context)
 
-    categories = Category.objects.prefetch_related("events").all()
+    categories = category_summaries(timezone.now().date())
     context = {
         "categories": categories,
     }
@@ -270,6 +357,45 @@ def category_dashboard(request):
     return render(request, "dashboard/CategoryDashboard.html", context)
 
 
+@login_required
+@user_passes_test(lambda u: is_admin(u) or is_organizer(u))
+def category_events(request, category_id):
+    """One category's events, a keyset page at a time, loaded on demand."""
+
+    category = get_object_or_404(
+        category_summaries(timezone.now().date()), pk=category_id
+    )
+    page = paginate_events(request, all_events().filter(category=category))
+
+    if _wants_json(request):
+        return JsonResponse(
+            {
+                "category": category.name,
+                "events": [
+                    {
+                        "id": event.pk,
+                        "name": event.name,
+                        "date": event.date,
+                        "time": event.time,
+                        "location": event.location,
+                        "rsvp_count": event.rsvp_count,
+                        "capacity": event.capacity,
+                    }
+                    for event in page
+                ],
+                "next": page.next_query if page.has_next else None,
+                "previous": page.previous_query if page.has_previous else None,
+            }
+        )
+
+    context = {
+        "category": category,
+        "events": page.object_list,
+        "page": page,
+    }
+    return render(request, "dashboard/CategoryEvents.html", context)
+
+
 @login_required
 @user_passes_test(lambda u: is_admin(u) or is_organizer(u))
 def create_event(request):
@@ -1,4 +1,5 @@
 # run.py
+import json
 import os
 import sys
 import subprocess
@@ -7,6 +8,7 @@ import shutil
 
 VENV_DIR = "venv"
 TAILWIND_DIR = "theme"
+STATIC_ROOT = "staticfiles"
 
 IS_WINDOWS = os.name == "nt"
 
@@ -18,15 +20,16 @@ COMMANDS = {
     "build": "python manage.py tailwind build",
     "collectstatic": "python manage.py collectstatic --noinput",
     "start": "combined_start",
+    "release": "release",
     "shell": "python manage.py shell_plus --ptpython",
     "drop": "python manage.py flush --no-input",
 }
 
 
-def run_shell(cmd, check=True):
+def run_shell(cmd, check=True, env=None):
     print(f"\n▶ {cmd}")
     try:
-        subprocess.run(cmd, shell=True, check=check)
+        subprocess.run(cmd, shell=True, check=check, env=env)
     except subprocess.CalledProcessError as e:
         print(f"❌ Command failed: {e}")
         sys.exit(e.returncode)
@@ -96,6 +99,59 @@ def combined_start():
     run_shell("python manage.py runserver")
 
 
+def release():
+    """
+    Build the production CSS, then collect every static file under its
+    content-hashed name with gzip and Brotli copies, and report what the
+    compression saves per asset.
+    """
+
+    run_shell(COMMANDS["build"])
+    env = {**os.environ, "STATIC_MANIFEST": "True"}
+    run_shell(f"{COMMANDS['collectstatic']} --clear", env=env)
+    report_static_sizes()
+
+
+def report_static_sizes():
+    root = Path(STATIC_ROOT)
+    manifest = root / "staticfiles.json"
+    if not manifest.exists():
+        print(f"❌ No manifest at {manifest}; is STATIC_MANIFEST on?")
+        sys.exit(1)
+
+    rows = []
+    for hashed in json.loads(manifest.read_text())["paths"].values():
+        path = root / hashed
+        size = path.stat().st_size
+        compressed = {
+            ext: (root / f"{hashed}.{ext}").stat().st_size
+            for ext in ("gz", "br")
+            if (root / f"{hashed}.{ext}").exists()
+        }
+        rows.append((hashed, size, compressed))
+    rows.sort(key=lambda row: row[1] - min(row[2].values(), default=row[1]))
+
+    def fmt(size):
+        return f"{size:>10,}" if size is not None else f"{'-':>10}"
+
+    print(f"\n{'asset':<60} {'bytes':>10} {'gzip':>10} {'brotli':>10} {'saved':>10}")
+    total = total_best = 0
+    for hashed, size, compressed in reversed(rows):
+        best = min(compressed.values(), default=size)
+        total += size
+        total_best += best
+        print(
+            f"{hashed:<60} {fmt(size)} {fmt(compressed.get('gz'))} "
+            f"{fmt(compressed.get('br'))} {fmt(size - best)}"
+        )
+    print(
+        f"{f'{len(rows)} assets':<60} {fmt(total)} {'':>10} {'':>10} "
+        f"{fmt(total - total_best)}"
+    )
+    if not any("br" in compressed for _, _, compressed in rows):
+        print("ℹ️  No Brotli copies: install the brotli package to get them.")
+
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python run.py <command>")
@@ -110,6 +166,8 @@ def main():
 
     if COMMANDS[cmd] == "combined_start":
         combined_start()
+    elif COMMANDS[cmd] == "release":
+        release()
     else:
         run_shell(COMMANDS[cmd])
 
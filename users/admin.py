@@ -1,3 +1,6 @@
 from django.contrib import admin
 
 # Register your models here.
+from users.models import OutboxMessage
+
+admin.site.register(OutboxMessage)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from users.outbox import drain
+
+
+class Command(BaseCommand):
+    help = "Send queued emails from the outbox in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Messages sent per SMTP connection",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls when the outbox is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Send what is due and exit instead of polling forever",
+        )
+
+    def handle(self, *args, **options):
+        sent = drain(
+            batch_size=max(1, options["batch_size"]),
+            poll_interval=options["poll_interval"],
+            once=options["once"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s)."))
@@ -0,0 +1,143 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from users.models import OutboxMessage
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+STALE_AFTER = timedelta(minutes=10)
+
+
+def queue_email(subject, body, recipient_list, from_email=None):
+    """
+    Record an email in the outbox. The row is written in the caller's
+    transaction, so it is only ever sent if that transaction commits.
+    """
+
+    return OutboxMessage.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        recipients=list(recipient_list),
+    )
+
+
+def _claimable(now):
+    return OutboxMessage.objects.filter(
+        Q(status=OutboxMessage.Status.PENDING, next_attempt_at__lte=now)
+        | Q(status=OutboxMessage.Status.SENDING, locked_at__lt=now - STALE_AFTER)
+    )
+
+
+def claim_batch(batch_size):
+    now = timezone.now()
+    candidates = list(
+        _claimable(now).order_by("next_attempt_at").values_list("id", flat=True)[
+            :batch_size
+        ]
+    )
+    if not candidates:
+        return []
+
+    # Rows another worker claimed in the meantime no longer match _claimable.
+    _claimable(now).filter(id__in=candidates).update(
+        status=OutboxMessage.Status.SENDING,
+        locked_at=now,
+        attempts=F("attempts") + 1,
+    )
+    return list(
+        OutboxMessage.objects.filter(
+            id__in=candidates, status=OutboxMessage.Status.SENDING, locked_at=now
+        )
+    )
+
+
+def _backoff(attempts):
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def _mark_failed(message, error):
+    now = timezone.now()
+    if message.attempts >= MAX_ATTEMPTS:
+        status, next_attempt_at = OutboxMessage.Status.FAILED, message.next_attempt_at
+    else:
+        status, next_attempt_at = (
+            OutboxMessage.Status.PENDING,
+            now + _backoff(message.attempts),
+        )
+    OutboxMessage.objects.filter(id=message.id).update(
+        status=status, next_attempt_at=next_attempt_at, last_error=error
+    )
+
+
+def send_batch(messages):
+    """Send ``messages`` over one SMTP connection; return how many were sent."""
+
+    if not messages:
+        return 0
+
+    mail_connection = get_connection()
+    try:
+        mail_connection.open()
+    except Exception as e:
+        for message in messages:
+            _mark_failed(message, f"connection failed: {e}")
+        return 0
+
+    sent = 0
+    try:
+        for message in messages:
+            email = EmailMessage(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email or None,
+                to=message.recipients,
+                connection=mail_connection,
+            )
+            try:
+                email.send(fail_silently=False)
+            except Exception as e:
+                _mark_failed(message, str(e))
+                continue
+
+            OutboxMessage.objects.filter(id=message.id).update(
+                status=OutboxMessage.Status.SENT,
+                sent_at=timezone.now(),
+                last_error="",
+            )
+            sent += 1
+    finally:
+        mail_connection.close()
+
+    return sent
+
+
+def drain(batch_size=50, poll_interval=5.0, once=False, stop_event=None):
+    stop_event = stop_event or threading.Event()
+    sent = 0
+
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            messages = claim_batch(batch_size)
+
+            if not messages:
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            sent += send_batch(messages)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connection.close()
+
+    return sent
@@ -3,25 +3,24 @@ from django.db.models.signals import post_save
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.tokens import default_token_generator
 from django.conf import settings
-from django.core.mail import send_mail
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
+from users.outbox import queue_email
 
 
 @receiver(post_save, sender=User)
 def send_activation_email(sender, instance, created, **kwargs):
     """
-    Send activation email when a new user is created
+    Queue activation email when a new user is created
     """
     if created and not instance.is_active:
-        try:
-            token = default_token_generator.make_token(instance)
-            uid = urlsafe_base64_encode(force_bytes(instance.pk))
+        token = default_token_generator.make_token(instance)
+        uid = urlsafe_base64_encode(force_bytes(instance.pk))
 
-            activation_url = f"{settings.FRONTEND_URL}/users/activate/{uid}/{token}/"
+        activation_url = f"{settings.FRONTEND_URL}/users/activate/{uid}/{token}/"
 
-            subject = "Activate Your Account - Event Management"
-            message = f"""
+        subject = "Activate Your Account - Event Management"
+        message = f"""
 Hi {instance.username},
 
 Thank you for signing up for Event Management!
@@ -33,22 +32,21 @@ If you didn't create this account, please ignore this email.
 
 Best regards,
 The Event Management Team
-            """.strip()
-
-            recipient_list = [instance.email]
+        """.strip()
 
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=recipient_list,
-                fail_silently=False,
-            )
+        recipient_list = [instance.email]
 
-            print(f"Activation email sent successfully to {instance.email}")
+        # Not wrapped in try/except: the row is written in the caller's
+        # transaction, and a database error there must abort it rather than
+        # let it commit without the email.
+        queue_email(
+            subject=subject,
+            body=message,
+            recipient_list=recipient_list,
+            from_email=settings.EMAIL_HOST_USER,
+        )
 
-        except Exception as e:
-            print(f"Failed to send activation email to {instance.email}: {str(e)}")
+        print(f"Activation email queued for {instance.email}")
 
 
 @receiver(post_save, sender=User)
@@ -60,10 +58,9 @@ def assign_role(sender, instance, created, **kwargs):
 
 
 def send_rsvp_confirmation_email(user, event):
-    """Send RSVP confirmation email"""
-    try:
-        subject = f"RSVP Confirmation - {event.name}"
-        message = f"""
+    """Queue RSVP confirmation email"""
+    subject = f"RSVP Confirmation - {event.name}"
+    message = f"""
 Hi {user.username},
 
 You have successfully RSVP'd to the event: {event.name}
@@ -78,17 +75,42 @@ We look forward to seeing you at the event!
 
 Best regards,
 Event Management Team
-        """.strip()
+    """.strip()
 
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
+    queue_email(
+        subject=subject,
+        body=message,
+        recipient_list=[user.email],
+        from_email=settings.EMAIL_HOST_USER,
+    )
+
+    print(f"RSVP confirmation email queued for {user.email}")
+
+
+def send_waitlist_promotion_email(user, event):
+    """Queue email telling a waitlisted user they now have a seat"""
+    subject = f"You're in! - {event.name}"
+    message = f"""
+Hi {user.username},
+
+A seat opened up and you have been moved from the waitlist to the attendee list for: {event.name}
+
+Event Details:
+- Title: {event.name}
+- Date: {event.date}
+- Location: {event.location}
+
+If you can no longer attend, please cancel your RSVP so the next person in line can take your seat.
+
+Best regards,
+Event Management Team
+    """.strip()
 
-        print(f"RSVP confirmation email sent successfully to {user.email}")
+    queue_email(
+        subject=subject,
+        body=message,
+        recipient_list=[user.email],
+        from_email=settings.EMAIL_HOST_USER,
+    )
 
-    except Exception as e:
-        print(f"Failed to send RSVP confirmation email to {user.email}: {str(e)}")
+    print(f"Waitlist promotion email queued for {user.email}")
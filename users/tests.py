@@ -1,3 +1,123 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.db import DatabaseError, transaction
 from django.test import TestCase
+from django.utils import timezone
+
+from users.models import OutboxMessage
+from users.outbox import (
+    MAX_ATTEMPTS,
+    STALE_AFTER,
+    claim_batch,
+    drain,
+    queue_email,
+    send_batch,
+)
+
+
+def queue(subject="Hello", recipient="someone@example.com"):
+    return queue_email(subject=subject, body="Body", recipient_list=[recipient])
+
+
+class OutboxQueueingTests(TestCase):
+    def test_signup_queues_the_activation_email(self):
+        User.objects.create_user(
+            "newcomer", email="newcomer@example.com", password="x", is_active=False
+        )
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.Status.PENDING)
+        self.assertEqual(message.recipients, ["newcomer@example.com"])
+        self.assertIn("/users/activate/", message.body)
+        self.assertEqual(mail.outbox, [])
+
+    def test_active_users_get_no_activation_email(self):
+        User.objects.create_user("admin", email="admin@example.com", password="x")
+
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_rolled_back_transaction_queues_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                queue()
+                raise RuntimeError
+
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_outbox_errors_abort_the_signup(self):
+        with mock.patch("users.signals.queue_email", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                with transaction.atomic():
+                    User.objects.create_user(
+                        "newcomer", email="newcomer@example.com", is_active=False
+                    )
+
+        self.assertFalse(User.objects.filter(username="newcomer").exists())
+
+
+class OutboxDeliveryTests(TestCase):
+    def test_claim_takes_due_messages_once(self):
+        due = queue()
+        later = queue()
+        OutboxMessage.objects.filter(pk=later.pk).update(
+            next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        claimed = claim_batch(10)
+
+        self.assertEqual([message.pk for message in claimed], [due.pk])
+        self.assertEqual(claimed[0].status, OutboxMessage.Status.SENDING)
+        self.assertEqual(claimed[0].attempts, 1)
+        self.assertEqual(claim_batch(10), [])
+
+    def test_stale_claims_are_taken_again(self):
+        message = queue()
+        claim_batch(10)
+        OutboxMessage.objects.filter(pk=message.pk).update(
+            locked_at=timezone.now() - STALE_AFTER - timedelta(seconds=1)
+        )
+
+        self.assertEqual([m.pk for m in claim_batch(10)], [message.pk])
+
+    def test_send_batch_delivers_and_marks_sent(self):
+        queue("First")
+        queue("Second")
+
+        self.assertEqual(send_batch(claim_batch(10)), 2)
+
+        self.assertEqual([email.subject for email in mail.outbox], ["First", "Second"])
+        self.assertFalse(
+            OutboxMessage.objects.exclude(status=OutboxMessage.Status.SENT).exists()
+        )
+
+    def test_failures_back_off_then_give_up(self):
+        message = queue()
+
+        with mock.patch(
+            "django.core.mail.EmailMessage.send", side_effect=OSError("refused")
+        ):
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                OutboxMessage.objects.filter(pk=message.pk).update(
+                    next_attempt_at=timezone.now()
+                )
+                self.assertEqual(send_batch(claim_batch(10)), 0)
+
+                message.refresh_from_db()
+                self.assertEqual(message.attempts, attempt)
+                self.assertEqual(message.last_error, "refused")
+                if attempt < MAX_ATTEMPTS:
+                    self.assertEqual(message.status, OutboxMessage.Status.PENDING)
+                    self.assertGreater(message.next_attempt_at, timezone.now())
+
+        self.assertEqual(message.status, OutboxMessage.Status.FAILED)
+        self.assertEqual(claim_batch(10), [])
+
+    def test_drain_once_sends_everything_due(self):
+        for i in range(3):
+            queue(f"Message {i}")
 
-# Create your tests here.
+        self.assertEqual(drain(batch_size=2, once=True), 3)
+        self.assertEqual(len(mail.outbox), 3)